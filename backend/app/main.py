@@ -1,14 +1,22 @@
 import os
+import asyncio
+import logging
 from dotenv import load_dotenv
+
+# Load environment variables from .env file before the routers read them at import
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO)
+
 from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import example, analyze, tasks, metrics, leaderboard, qwen_api
+from app.routers import example, analyze, tasks, metrics, leaderboard, qwen_api, log_store, cerebras_qwen, qwen_model
 
-# Load environment variables from .env file
-load_dotenv()
+app = FastAPI(default_response_class=ORJSONResponse)
 
-app = FastAPI()
+# Load the task models at startup instead of on the first request that needs them
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "true").lower() == "true"
 
 # Add CORS middleware
 app.add_middleware(
@@ -27,6 +35,26 @@ app.include_router(tasks.router)
 app.include_router(leaderboard.router)
 app.include_router(qwen_api.router)
 
+@app.on_event("startup")
+async def start_log_writer():
+    log_store.build_index()
+    log_store.start_writer()
+    leaderboard.warm_cache()
+
+@app.on_event("startup")
+async def preload_models():
+    if PRELOAD_MODELS:
+        await asyncio.to_thread(tasks.preload_models)
+
+@app.on_event("shutdown")
+async def stop_log_writer():
+    await log_store.stop_writer()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await cerebras_qwen.close_clients()
+    await qwen_model.close_clients()
+
 @app.get("/")
 def read_root():
     return {"message": "Hello, FastAPI!"}
@@ -1,29 +1,31 @@
 import os
 import time
-import re
+import logging
+import asyncio
 from typing import Optional
-import httpx
-from .qwen_model import call_qwen_model_local, call_qwen_model_api, parse_task_from_response
-from .cerebras_qwen import classify_task_with_cerebras_qwen, call_cerebras_qwen
+from .task_keywords import classify_from_text
+from .qwen_model import call_qwen_model_local, call_qwen_model_api, call_qwen_model_api_async, parse_task_from_response
+from .cerebras_qwen import (
+    classify_task_with_cerebras_qwen,
+    classify_task_with_cerebras_qwen_async,
+    build_classification_prompt,
+    DEBUG_CEREBRAS
+)
 
-# Prompt template for Qwen model
-prompt_template = """
-Classify the AI task based on the question and image description.
+# Resolved once at import; toggling requires a restart
+USE_CEREBRAS = os.getenv("USE_CEREBRAS_QWEN", "false").lower() == "true"
 
-Question: {question}
-Image: {image_context}
+logger = logging.getLogger(__name__)
 
-Respond with exactly one of these options:
-- OCR
-- Image Captioning
-- Visual QA
-- Image Classification
-- Object Detection
-- Style Transfer
-- Medical Diagnosis
-- Other
+def _log_latency(label: str, start_time: float) -> None:
+    if DEBUG_CEREBRAS:
+        logger.info("%s latency: %.4fs", label, time.time() - start_time)
 
-Task:"""
+def _task_from_api_response(response: str) -> Optional[str]:
+    """Parse a Qwen API reply, or None if it is an error and the local model should be tried"""
+    if response.startswith("Error:"):
+        return None
+    return parse_task_from_response(response)
 
 def classify_task_with_qwen(question: str, image_context: Optional[str] = None) -> str:
     """
@@ -39,43 +41,70 @@ def classify_task_with_qwen(question: str, image_context: Optional[str] = None)
     start_time = time.time()
     
     # Check if Cerebras is preferred
-    print(os.getenv("USE_CEREBRAS_QWEN", "false"))
-    use_cerebras = os.getenv("USE_CEREBRAS_QWEN", "false").lower() == "true"
-
-    if use_cerebras:
+    if USE_CEREBRAS:
         try:
             result = classify_task_with_cerebras_qwen(question, image_context)
-            latency = time.time() - start_time
-            print(f"Cerebras Qwen classification latency: {latency:.4f}s")
+            _log_latency("Cerebras Qwen classification", start_time)
             return result
         except Exception as e:
-            print(f"Cerebras Qwen classification failed: {e}")
-    
-    # Format the prompt
-    prompt = prompt_template.format(
-        question=question,
-        image_context=image_context or "No image context provided"
-    )
+            logger.warning("Cerebras Qwen classification failed: %s", e)
     
+    prompt = build_classification_prompt(question, image_context)
     try:
         # Try API first, fallback to local if API fails
         try:
-            response = call_qwen_model_api(prompt)
-            if not response.startswith("Error:"):
-                return parse_task_from_response(response)
+            task = _task_from_api_response(call_qwen_model_api(prompt))
+            if task is not None:
+                return task
         except Exception as api_error:
-            print(f"Qwen API call failed: {api_error}")
+            logger.warning("Qwen API call failed: %s", api_error)
         
-        # Fallback to local model
-        response = call_qwen_model_local(prompt)
-        return parse_task_from_response(response)
+        return parse_task_from_response(call_qwen_model_local(prompt))
+    except Exception as e:
+        logger.warning("All Qwen model calls failed: %s", e)
+        return "Other"
+    finally:
+        _log_latency("Classification", start_time)
+
+async def classify_task_with_qwen_async(question: str, image_context: Optional[str] = None) -> str:
+    """
+    Async version of classify_task_with_qwen for FastAPI handlers
+    
+    Args:
+        question (str): The user's question
+        image_context (Optional[str]): Description of the image
+        
+    Returns:
+        str: The predicted AI task or "Other" if API call fails
+    """
+    start_time = time.time()
+    
+    # Check if Cerebras is preferred
+    if USE_CEREBRAS:
+        try:
+            result = await classify_task_with_cerebras_qwen_async(question, image_context)
+            _log_latency("Cerebras Qwen classification", start_time)
+            return result
+        except Exception as e:
+            logger.warning("Cerebras Qwen classification failed: %s", e)
+    
+    prompt = build_classification_prompt(question, image_context)
+    try:
+        # Try API first, fallback to local if API fails
+        try:
+            task = _task_from_api_response(await call_qwen_model_api_async(prompt))
+            if task is not None:
+                return task
+        except Exception as api_error:
+            logger.warning("Qwen API call failed: %s", api_error)
         
+        # The local model is blocking, keep it off the event loop
+        return parse_task_from_response(await asyncio.to_thread(call_qwen_model_local, prompt))
     except Exception as e:
-        print(f"All Qwen model calls failed: {e}")
+        logger.warning("All Qwen model calls failed: %s", e)
         return "Other"
     finally:
-        latency = time.time() - start_time
-        print(f"Classification latency: {latency:.4f}s")
+        _log_latency("Classification", start_time)
 
 def mock_classify_task(question: str) -> str:
     """
@@ -87,45 +116,12 @@ def mock_classify_task(question: str) -> str:
     Returns:
         str: The predicted AI task
     """
-    question_lower = question.lower()
-    
-    # Medical Diagnosis detection (check first as it's more specific)
-    medical_keywords = ["medical", "diagnosis", "health", "doctor", "patient", "disease", "condition", "symptoms", "diagnose"]
-    if any(keyword in question_lower for keyword in medical_keywords):
-        return "Medical Diagnosis"
-    
-    # OCR detection
-    ocr_keywords = ["text", "read", "extract", "ocr", "words", "letters", "characters", "document"]
-    if any(keyword in question_lower for keyword in ocr_keywords):
-        return "OCR"
-    
-    # Image Classification detection
-    classification_keywords = ["classify", "category", "type", "kind", "sort", "group", "label"]
-    if any(keyword in question_lower for keyword in classification_keywords):
-        return "Image Classification"
-    
-    # Object Detection detection
-    object_keywords = ["objects", "items", "things", "find", "locate", "bounding box", "coordinates", "detect"]
-    if any(keyword in question_lower for keyword in object_keywords):
-        return "Object Detection"
-    
-    # Style Transfer detection
-    style_keywords = ["style", "art", "transform", "convert", "change style", "make it look like"]
-    if any(keyword in question_lower for keyword in style_keywords):
-        return "Style Transfer"
-    
-    # Image Captioning detection
-    caption_keywords = ["describe", "caption", "what is this", "what do you see", "scene", "picture", "image"]
-    if any(keyword in question_lower for keyword in caption_keywords):
-        return "Image Captioning"
-    
-    # Visual QA detection (more specific patterns)
-    vqa_keywords = ["what color", "how many", "count", "identify", "recognize"]
-    if any(keyword in question_lower for keyword in vqa_keywords):
-        return "Visual QA"
+    task = classify_from_text(question)
+    if task != "Other":
+        return task
     
     # General Visual QA patterns
-    if question_lower.startswith("what") or question_lower.startswith("where") or question_lower.startswith("how"):
+    if question.lower().startswith(("what", "where", "how")):
         return "Visual QA"
     
     return "Other"
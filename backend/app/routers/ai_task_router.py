@@ -1,5 +1,5 @@
 from fastapi import APIRouter, File, Form, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from typing import Optional
 import os
 
@@ -14,7 +14,7 @@ async def process_image(question: str = Form(...), image: UploadFile = File(...)
     output, latency = dispatch_to_model(task_type, image)
 
     # Return model output, latency, task type, and model used
-    return JSONResponse(content={"task": task_type, "output": output, "latency": latency}, media_type="application/json")
+    return ORJSONResponse(content={"task": task_type, "output": output, "latency": latency})
 
 def determine_task_type(question: str, image: UploadFile):
     # TO DO: implement Qwen task type classification
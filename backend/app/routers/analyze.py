@@ -1,66 +1,152 @@
 import os
+import io
+import asyncio
 import random
 import time
-import json
-import traceback
+import hashlib
+import logging
 from datetime import datetime
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
-import shutil
-from app.routers.ai_classifier import classify_task_with_qwen, mock_classify_task
-import httpx
+from typing import Optional
+from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException
+from fastapi.responses import ORJSONResponse
+import aiofiles
+from app.routers.ai_classifier import classify_task_with_qwen_async, mock_classify_task
+from app.routers.cerebras_qwen import CEREBRAS_CLASSIFY_TIMEOUT
 import uuid
 from pathlib import Path
 from PIL import Image
 
-from app.routers.tasks import get_image_caption
+from app.routers.tasks import (
+    TaskRequest,
+    get_image_caption_async,
+    ocr_task,
+    simocr_task,
+    caption_task,
+    vqa_task,
+    medical_task,
+    other_task
+)
+from app.routers import log_store
 
 router = APIRouter(
     prefix="/analyze",
     tags=["analyze"]
 )
 
+logger = logging.getLogger(__name__)
+
 # Create absolute path to uploads directory
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 UPLOAD_DIR = BASE_DIR / "uploads"
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# Map task names to task handlers (OCR picks between ocr and simocr per request)
+TASK_ENDPOINTS = {
+    "Image Captioning": "caption",
+    "Visual QA": "vqa",
+    "Image Classification": "other",
+    "Object Detection": "other",
+    "Style Transfer": "other",
+    "Medical Diagnosis": "medical",
+    "Other": "other"
+}
+
+TASK_FNS = {
+    "ocr": ocr_task,
+    "simocr": simocr_task,
+    "caption": caption_task,
+    "vqa": vqa_task,
+    "medical": medical_task,
+    "other": other_task
+}
+
+# Leading bytes of the accepted image formats, mapped to the extension the upload is saved with
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": ".jpg",
+    b"\x89PNG\r\n\x1a\n": ".png"
+}
+
+def _image_extension(head: bytes) -> Optional[str]:
+    """Return the file extension for an accepted image signature, or None"""
+    for signature, extension in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return extension
+    return None
+
+def _quick_task(question: str) -> Optional[str]:
+    """
+    Return the task when the question names it outright, or None
+
+    Questions that only look like Visual QA (or match nothing) still need the
+    caption and the model to be classified.
+    """
+    task = mock_classify_task(question)
+    return None if task in ("Other", "Visual QA") else task
+
+# How often to check whether the client has gone away while waiting on a model
+DISCONNECT_POLL_INTERVAL = 0.1
+
+async def _cancel_on_disconnect(request: Request, awaitable):
+    """Await awaitable, cancelling it if the client disconnects first"""
+    task = asyncio.ensure_future(awaitable)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            raise HTTPException(status_code=499, detail="Client closed request")
+
 @router.post("/")
 async def analyze_image(
+    request: Request,
     question: str = Form(...),
     image: UploadFile = File(...)
 ):
     total_start_time = time.time()
     
-    # Validate file type
-    if image.content_type not in ["image/jpeg", "image/png"]:
-        return JSONResponse(
+    # Validate file type from the magic bytes; content_type is whatever the client claims
+    head = await image.read(16)
+    await image.seek(0)
+    extension = _image_extension(head)
+    if extension is None:
+        return ORJSONResponse(
             status_code=400,
             content={"error": "Only JPG and PNG images are allowed"}
         )
     
-    # Save the uploaded image
-    file_path = os.path.join(UPLOAD_DIR, image.filename)
-    
-    # Handle potential filename conflicts
-    base_name, extension = os.path.splitext(image.filename)
-    counter = 1
-    while os.path.exists(file_path):
-        new_filename = f"{base_name}_{counter}{extension}"
-        file_path = os.path.join(UPLOAD_DIR, new_filename)
-        counter += 1
+    # Read the upload once and reuse the bytes for both the saved copy and PIL
+    data = await image.read()
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
+    # Name the saved copy by content hash, so identical uploads share one file
+    digest = hashlib.sha1(data).hexdigest()
+    file_path = str(UPLOAD_DIR / f"{digest}{extension}")
     
-    # Create image context (using filename for now)
-    # image_context = f"Image file: {os.path.basename(file_path)}"
-    pil_image = Image.open(image.file).convert("RGB")
-    image_context = get_image_caption(pil_image)
+    if not os.path.exists(file_path):
+        # Write to a unique temp name and rename, so a concurrent upload never sees a partial file
+        tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        async with aiofiles.open(tmp_path, "wb") as buffer:
+            await buffer.write(data)
+        os.replace(tmp_path, file_path)
     
     # Classify the task
     classification_start_time = time.time()
-    task = classify_task_with_qwen(question, image_context)
+    # A question that names its task outright skips captioning and the model call
+    task = _quick_task(question)
+    if task is None:
+        # Create image context (using filename for now)
+        # image_context = f"Image file: {os.path.basename(file_path)}"
+        pil_image = Image.open(io.BytesIO(data)).convert("RGB")
+        image_context = await get_image_caption_async(pil_image)
+        
+        try:
+            task = await _cancel_on_disconnect(
+                request,
+                asyncio.wait_for(classify_task_with_qwen_async(question, image_context), timeout=CEREBRAS_CLASSIFY_TIMEOUT)
+            )
+        except asyncio.TimeoutError:
+            # Don't hold the request on a slow model; fall back to keyword classification
+            task = mock_classify_task(question)
     classification_latency = time.time() - classification_start_time
     
     # Handle the task
@@ -81,35 +167,17 @@ async def analyze_image(
         "result": result
     }
     
-    # Read existing logs
-    logs = []
-    logs_file = BASE_DIR / "logs.json"
-    if os.path.exists(logs_file):
-        try:
-            with open(logs_file, 'r') as f:
-                logs = json.load(f)
-        except json.JSONDecodeError:
-            pass  # If file is empty or corrupted, start with empty list
-    
-    # Append new log entry
-    logs.append(log_entry)
-    
-    # Write logs back to file
-    with open(logs_file, 'w') as f:
-        json.dump(logs, f, indent=2)
+    # Queue the entry for the background writer so disk I/O stays off the request path
+    log_store.append_entry(log_entry)
     
-    # Print to console
-    print(f"Question: {question}")
-    print(f"Image filename: {os.path.basename(file_path)}")
-    print(f"Classified task: {task}")
-    print(f"Result: {result}")
+    logger.debug("Question: %s | image: %s | task: %s", question, os.path.basename(file_path), task)
     
     # Return JSON response
     return {
         "id": log_entry["id"],
         "task": task,
         "question": question,
-        "filename": os.path.basename(file_path),
+        "filename": image.filename,
         "result": result,
         "latency": total_latency,
         "model": model_used
@@ -117,7 +185,7 @@ async def analyze_image(
 
 async def handle_task(task: str, image_path: str, question: str) -> tuple[str, str]:
     """
-    Handle different AI tasks by routing to appropriate endpoints
+    Handle different AI tasks by calling the matching task handler in-process
     
     Args:
         task (str): The classified AI task
@@ -127,73 +195,37 @@ async def handle_task(task: str, image_path: str, question: str) -> tuple[str, s
     Returns:
         tuple: (result string, model name used)
     """
+    model_used = "pytesseract"
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Map task names to endpoint URLs
-            task_mapping = {
-                "OCR": "pytesseract",  # Default to pytesseract for OCR
-                "Image Captioning": "caption",
-                "Visual QA": "vqa",
-                "Image Classification": "other",
-                "Object Detection": "other",
-                "Style Transfer": "other",
-                "Medical Diagnosis": "medical",
-                "Other": "other"
-            }
-            
-            # For OCR tasks, randomly choose between OCR and SimOCR for demo
-            model_used = "pytesseract"
-            endpoint = task_mapping.get(task, "other")
-            if task == "OCR":
-                endpoint = random.choice(["ocr", "simocr"])
-                if endpoint == "simocr":
-                    model_used = "simocr"
-                elif endpoint == "ocr":
-                    model_used = "pytesseract"  # OCR route now uses pytesseract as primary
-            
-            url = f"http://localhost:8000/task/{endpoint}"
-            print(f"Making request to: {url}")
-            print(f"Request data: image_path={image_path}, question={question}")
-            
-            response = await client.post(
-                url,
-                json={"image_path": image_path, "question": question}
-            )
-            
-            print(f"Response status: {response.status_code}")
-            print(f"Response headers: {response.headers}")
-            print(f"Response text: {response.text}")
-            
-            if response.status_code == 200:
-                result_data = response.json()
-                print(f"Result data: {result_data}")
-                return result_data.get("result", "Task completed successfully"), model_used
-            else:
-                return f"Task handling failed with status {response.status_code}", model_used
+        # For OCR tasks, randomly choose between OCR and SimOCR for demo
+        endpoint = TASK_ENDPOINTS.get(task, "other")
+        if task == "OCR":
+            endpoint = random.choice(["ocr", "simocr"])
+            if endpoint == "simocr":
+                model_used = "simocr"
+            elif endpoint == "ocr":
+                model_used = "pytesseract"  # OCR route now uses pytesseract as primary
+        
+        result_data = await TASK_FNS[endpoint](TaskRequest(image_path=image_path, question=question))
+        return result_data.get("result", "Task completed successfully"), model_used
                 
+    except HTTPException as e:
+        # Task handlers signal failures with HTTPException, as they did over HTTP
+        logger.warning("Task handler returned status %s: %s", e.status_code, e.detail)
+        return f"Task handling failed with status {e.status_code}", model_used
     except Exception as e:
-        print(f"Task handling error: {e}")
-        traceback.print_exc()
+        logger.exception("Task handling error: %s", e)
         return "Task handling failed due to an error", "error"
 
 @router.get("/result/{result_id}")
 async def get_result(result_id: str):
-    logs_file = BASE_DIR / "logs.json"
-
-    print(f"Looking for result_id: {result_id}")
-    print(f"Logs file path: {logs_file}")
-    
-    if not os.path.exists(logs_file):
-        raise HTTPException(status_code=404, detail="No results found")
-    
-    with open(logs_file, 'r') as f:
-        logs = json.load(f)
-    
-    print(f"Total entries in logs: {len(logs)}")
+    logger.debug("Looking for result_id: %s", result_id)
     
-    result_entry = next((entry for entry in logs if entry.get("id") == result_id), None)
+    result_entry = log_store.find_entry(result_id)
     
     if not result_entry:
+        if not os.path.exists(log_store.LOGS_FILE):
+            raise HTTPException(status_code=404, detail="No results found")
         raise HTTPException(status_code=404, detail=f"Result not found for ID: {result_id}")
     
     return result_entry
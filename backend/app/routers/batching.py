@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+class MicroBatcher:
+    """
+    Coalesce concurrent calls into batches handed to a single handler
+
+    Items submitted within max_wait_ms of the first queued item (or until
+    max_batch items are waiting) are passed to the handler together. The
+    handler must return one result per item, in order; a result that is an
+    exception is raised to that item's caller only.
+
+    Items still queued past their timeout fail with asyncio.TimeoutError, and
+    items whose caller stopped waiting are dropped, so neither reaches the handler.
+
+    Up to max_concurrency batches run at once; while all slots are busy, new
+    items keep queuing and go out together in the next batch.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], Awaitable[List[Any]]], max_batch: int = 16, max_wait_ms: float = 20, timeout: Optional[float] = None, max_concurrency: int = 1):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._full: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Running dispatches, referenced here so they aren't garbage collected mid-batch
+        self._inflight: set = set()
+
+    def _ensure_worker(self) -> None:
+        # The worker is bound to the loop it was started on; restart it if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._worker.get_loop() is loop:
+            return
+        self._queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._inflight = set()
+        self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """Queue an item and wait for its result"""
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = loop.time() + timeout if timeout is not None else None
+        self._queue.put_nowait((item, future, deadline))
+        if self._queue.qsize() >= self.max_batch:
+            self._full.set()
+        if timeout is None:
+            return await future
+        # Timing out cancels the future, so the worker drops the item if it is still queued
+        return await asyncio.wait_for(future, timeout)
+
+    async def _run(self) -> None:
+        # Bound to this loop's state; a restarted worker gets its own
+        slots, inflight = self._slots, self._inflight
+
+        def finished(task: asyncio.Task) -> None:
+            inflight.discard(task)
+            slots.release()
+
+        while True:
+            # Wait for a free slot before collecting, so a busy handler means bigger batches
+            await slots.acquire()
+            batch = [await self._queue.get()]
+
+            # Give other callers a short window to join the batch
+            if self._queue.qsize() + 1 < self.max_batch:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            batch = self._drop_stale(batch)
+            if not batch:
+                slots.release()
+                continue
+
+            # Run the batch in the background so a slow one doesn't hold up the queue
+            task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+            inflight.add(task)
+            task.add_done_callback(finished)
+
+    def _drop_stale(self, batch: list) -> list:
+        now = asyncio.get_running_loop().time()
+        live = []
+        for item, future, deadline in batch:
+            if future.done():
+                # Caller was cancelled (timed out or disconnected)
+                continue
+            if deadline is not None and now > deadline:
+                future.set_exception(asyncio.TimeoutError())
+                continue
+            live.append((item, future, deadline))
+        return live
+
+    async def _dispatch(self, batch: list) -> None:
+        try:
+            results = await self.handler([item for item, _, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -1,9 +1,89 @@
 import os
+import logging
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import httpx
+import asyncio
+import orjson
 import time
+import functools
 from typing import Optional, Dict, Any
 from dataclasses import dataclass
+from .batching import MicroBatcher
+from .task_keywords import classify_from_text, parse_task_from_response
+
+# Resolved once at import; toggling requires a restart
+DEBUG_CEREBRAS = os.getenv("DEBUG_CEREBRAS", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+# DEBUG_CEREBRAS turns on this module's debug logs without lowering the app-wide level
+if DEBUG_CEREBRAS:
+    logger.setLevel(logging.DEBUG)
+
+# Shared session so TCP/TLS connections are reused across requests
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+_SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+# Async counterpart used from FastAPI handlers so the event loop is never blocked;
+# HTTP/2 lets concurrent classifications share one connection to the API
+_ASYNC_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+)
+
+async def close_clients() -> None:
+    """Close the shared HTTP clients; called on app shutdown"""
+    await _ASYNC_CLIENT.aclose()
+    _SESSION.close()
+
+# Last endpoint that answered a probe, as (url, probed_at)
+_WORKING_URL: Optional[tuple[str, float]] = None
+_URL_TTL = 300
+
+# Classification micro-batching: prompts arriving within the window share one dispatch
+CEREBRAS_MAX_BATCH = int(os.getenv("CEREBRAS_MAX_BATCH", "16"))
+CEREBRAS_MAX_WAIT_MS = float(os.getenv("CEREBRAS_MAX_WAIT_MS", "20"))
+# Batches in flight at once; each prompt is its own API request, so this bounds concurrent calls
+CEREBRAS_MAX_CONCURRENT_BATCHES = int(os.getenv("CEREBRAS_MAX_CONCURRENT_BATCHES", "8"))
+# Seconds a classification may take, including time spent queued behind other batches
+CEREBRAS_CLASSIFY_TIMEOUT = float(os.getenv("CEREBRAS_CLASSIFY_TIMEOUT", "10"))
+
+def _invalidate_working_endpoint() -> None:
+    """Forget the cached endpoint so the next call probes again"""
+    global _WORKING_URL
+    _WORKING_URL = None
+
+def _cached_working_endpoint() -> Optional[str]:
+    """Return the last working endpoint if it was found within _URL_TTL seconds"""
+    if _WORKING_URL is not None and time.time() - _WORKING_URL[1] < _URL_TTL:
+        return _WORKING_URL[0]
+    return None
+
+def _remember_working_endpoint(url: Optional[str]) -> Optional[str]:
+    """Cache the result of an endpoint search (None clears it) and return it"""
+    global _WORKING_URL
+    if url is None:
+        _WORKING_URL = None
+        return None
+    logger.debug("Found working endpoint: %s", url)
+    _WORKING_URL = (url, time.time())
+    return url
+
+# Transport errors from either HTTP client, so the sync and async paths share their handling
+_CONNECT_ERRORS = (requests.exceptions.ConnectionError, httpx.ConnectError)
+_TIMEOUT_ERRORS = (requests.exceptions.Timeout, httpx.TimeoutException)
+_REQUEST_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError)
+
+def _describe_request_error(e: Exception, connect_hint: str = "", timeout_hint: str = "", sep: str = ": ") -> str:
+    """Describe a transport error, forgetting the cached endpoint if it stopped answering"""
+    if isinstance(e, _CONNECT_ERRORS):
+        _invalidate_working_endpoint()
+        return f"Connection error{sep}{str(e)}{connect_hint}"
+    if isinstance(e, _TIMEOUT_ERRORS):
+        return f"Request timeout{sep}{str(e)}{timeout_hint}"
+    return f"Request failed{sep}{str(e)}"
 
 @dataclass
 class CerebrasConfig:
@@ -31,7 +111,8 @@ class CerebrasQwenClient:
     
     def __init__(self, config: CerebrasConfig):
         self.config = config
-        self.session = requests.Session()
+        self.session = _SESSION
+        self._client = _ASYNC_CLIENT
         
         # Set up headers
         self.headers = {
@@ -45,22 +126,98 @@ class CerebrasQwenClient:
     def _test_endpoint_connectivity(self, url: str) -> bool:
         """Test if an endpoint is reachable"""
         try:
-            response = self.session.head(url, timeout=5)
+            response = self.session.head(url, timeout=2, allow_redirects=False)
             return response.status_code < 500  # Accept any response that's not a server error
         except:
             return False
     
     def _find_working_endpoint(self) -> Optional[str]:
-        """Find a working API endpoint from the list of URLs"""
-        urls_to_try = [self.config.api_url] + self.config.fallback_urls
+        """Find a working API endpoint, reusing the last one found for up to _URL_TTL seconds"""
+        cached = _cached_working_endpoint()
+        if cached is not None:
+            return cached
         
-        for url in urls_to_try:
+        for url in self._urls_to_try():
             if self._test_endpoint_connectivity(url):
-                if os.getenv("DEBUG_CEREBRAS", "false").lower() == "true":
-                    print(f"✅ Found working endpoint: {url}")
-                return url
+                return _remember_working_endpoint(url)
+        return _remember_working_endpoint(None)
+    
+    async def _test_endpoint_connectivity_async(self, url: str) -> bool:
+        """Async version of _test_endpoint_connectivity"""
+        try:
+            response = await self._client.head(url, timeout=2, follow_redirects=False)
+            return response.status_code < 500
+        except:
+            return False
+    
+    async def _find_working_endpoint_async(self) -> Optional[str]:
+        """Async version of _find_working_endpoint, sharing the same cache"""
+        cached = _cached_working_endpoint()
+        if cached is not None:
+            return cached
         
-        return None
+        for url in self._urls_to_try():
+            if await self._test_endpoint_connectivity_async(url):
+                return _remember_working_endpoint(url)
+        return _remember_working_endpoint(None)
+    
+    def _urls_to_try(self) -> list:
+        return [self.config.api_url] + self.config.fallback_urls
+    
+    def _build_request_data(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Build the completion request body"""
+        data = {
+            "prompt": prompt,
+            "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
+            "temperature": kwargs.get("temperature", self.config.temperature),
+            "model": self.config.model_name
+        }
+        
+        # Add optional parameters
+        if "top_p" in kwargs:
+            data["top_p"] = kwargs["top_p"]
+        if "top_k" in kwargs:
+            data["top_k"] = kwargs["top_k"]
+        if "stop" in kwargs:
+            data["stop"] = kwargs["stop"]
+        
+        return data
+    
+    def _result(self, start_time: float, **fields) -> Dict[str, Any]:
+        """Build the result dict returned by generate/generate_async"""
+        return {**fields, "latency": time.time() - start_time, "model": self.config.model_name}
+    
+    def _no_endpoint_result(self, start_time: float) -> Dict[str, Any]:
+        return self._result(
+            start_time,
+            success=False,
+            error="No working Cerebras API endpoint found. Please check your network connection and API configuration."
+        )
+    
+    def _response_result(self, response, start_time: float) -> Dict[str, Any]:
+        """Turn a requests or httpx response into a result dict"""
+        if response.status_code == 200:
+            try:
+                result = orjson.loads(response.content)
+            except orjson.JSONDecodeError as e:
+                # e.g. an HTML page from a proxy or gateway
+                return self._result(start_time, success=False, error=_describe_request_error(e))
+            return self._result(
+                start_time,
+                success=True,
+                response=result.get("text", result.get("response", "")),
+                raw_response=result
+            )
+        return self._result(start_time, success=False, error=f"API call error with status {response.status_code}: {response.text}")
+    
+    def _request_error_result(self, e: Exception, start_time: float) -> Dict[str, Any]:
+        """Turn a requests or httpx transport error into a result dict"""
+        error = _describe_request_error(
+            e,
+            connect_hint=". Please check your network connection and API endpoint.",
+            timeout_hint=". Please try again or increase timeout."
+        )
+        return self._result(start_time, success=False, error=error)
     
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
         """
@@ -78,81 +235,53 @@ class CerebrasQwenClient:
         # Find working endpoint
         working_url = self._find_working_endpoint()
         if not working_url:
-            return {
-                "success": False,
-                "error": "No working Cerebras API endpoint found. Please check your network connection and API configuration.",
-                "latency": time.time() - start_time,
-                "model": self.config.model_name
-            }
-        
-        # Prepare request data
-        data = {
-            "prompt": prompt,
-            "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
-            "temperature": kwargs.get("temperature", self.config.temperature),
-            "model": self.config.model_name
-        }
-        
-        # Add optional parameters
-        if "top_p" in kwargs:
-            data["top_p"] = kwargs["top_p"]
-        if "top_k" in kwargs:
-            data["top_k"] = kwargs["top_k"]
-        if "stop" in kwargs:
-            data["stop"] = kwargs["stop"]
+            return self._no_endpoint_result(start_time)
         
         try:
             # Make API request
             response = self.session.post(
                 working_url,
                 headers=self.headers,
-                json=data,
+                json=self._build_request_data(prompt, **kwargs),
                 timeout=self.config.timeout
             )
+        except _REQUEST_ERRORS as e:
+            return self._request_error_result(e, start_time)
+        return self._response_result(response, start_time)
+    
+    async def generate_async(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """
+        Async version of generate using the shared httpx.AsyncClient
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters (max_tokens, temperature, etc.)
             
-            latency = time.time() - start_time
-            
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    "success": True,
-                    "response": result.get("text", result.get("response", "")),
-                    "latency": latency,
-                    "model": self.config.model_name,
-                    "raw_response": result
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"API call error with status {response.status_code}: {response.text}",
-                    "latency": latency,
-                    "model": self.config.model_name
-                }
-                
-        except requests.exceptions.ConnectionError as e:
-            return {
-                "success": False,
-                "error": f"Connection error: {str(e)}. Please check your network connection and API endpoint.",
-                "latency": time.time() - start_time,
-                "model": self.config.model_name
-            }
-        except requests.exceptions.Timeout as e:
-            return {
-                "success": False,
-                "error": f"Request timeout: {str(e)}. Please try again or increase timeout.",
-                "latency": time.time() - start_time,
-                "model": self.config.model_name
-            }
-        except requests.exceptions.RequestException as e:
-            return {
-                "success": False,
-                "error": f"Request failed: {str(e)}",
-                "latency": time.time() - start_time,
-                "model": self.config.model_name
-            }
+        Returns:
+            Dict containing response and metadata
+        """
+        start_time = time.time()
+        
+        # Find working endpoint
+        working_url = await self._find_working_endpoint_async()
+        if not working_url:
+            return self._no_endpoint_result(start_time)
+        
+        try:
+            # Make API request
+            response = await self._client.post(
+                working_url,
+                headers=self.headers,
+                content=orjson.dumps(self._build_request_data(prompt, **kwargs)),
+                timeout=self.config.timeout
+            )
+        except _REQUEST_ERRORS as e:
+            return self._request_error_result(e, start_time)
+        return self._response_result(response, start_time)
 
+@functools.lru_cache(maxsize=1)
 def get_cerebras_config() -> CerebrasConfig:
-    """Get Cerebras configuration from environment variables"""
+    """Get Cerebras configuration from environment variables (read once per process)"""
     # Get the primary API URL
     primary_url = os.getenv("CEREBRAS_API_URL", "https://api.cerebras.com/v1/chat/completions")
     
@@ -176,6 +305,24 @@ def get_cerebras_config() -> CerebrasConfig:
         fallback_urls=fallback_urls
     )
 
+_CLIENT: Optional[CerebrasQwenClient] = None
+
+def get_client() -> CerebrasQwenClient:
+    """Return the process-wide client built from get_cerebras_config()"""
+    global _CLIENT
+    if _CLIENT is None:
+        _CLIENT = CerebrasQwenClient(get_cerebras_config())
+    return _CLIENT
+
+def _debug_call(config: CerebrasConfig, prompt: str) -> None:
+    logger.debug("Cerebras call - API URL: %s, model: %s, prompt: %.100s...", config.api_url, config.model_name, prompt)
+
+def _response_or_fallback(prompt: str, result: Dict[str, Any]) -> str:
+    """Return the model's response from a generate() result, or the fallback if it failed"""
+    if result["success"]:
+        return result["response"]
+    return _fallback_response(prompt, result["error"])
+
 def call_cerebras_qwen(prompt: str) -> str:
     """
     Call Cerebras Qwen model
@@ -186,28 +333,51 @@ def call_cerebras_qwen(prompt: str) -> str:
     Returns:
         Model response or error message
     """
-    config = get_cerebras_config()
-    client = CerebrasQwenClient(config)
-    
-    # Debug logging
-    if os.getenv("DEBUG_CEREBRAS", "false").lower() == "true":
-        print(f"Cerebras Debug - API URL: {config.api_url}")
-        print(f"Cerebras Debug - Model: {config.model_name}")
-        print(f"Cerebras Debug - Prompt: {prompt[:100]}...")
+    client = get_client()
+    _debug_call(client.config, prompt)
 
-    # Test connectivity first
-    working_url = client._find_working_endpoint()
-    if not working_url:
-        # Fallback to local or alternative implementation
-        return _fallback_response(prompt)
+    # generate() finds the working endpoint itself and reports failure if there is none
+    return _response_or_fallback(prompt, client.generate(prompt))
+
+async def call_cerebras_qwen_async(prompt: str) -> str:
+    """
+    Async version of call_cerebras_qwen for use inside the event loop
     
-    result = client.generate(prompt)
+    Args:
+        prompt: Input prompt
+        
+    Returns:
+        Model response or error message
+    """
+    client = get_client()
+    _debug_call(client.config, prompt)
     
-    if result["success"]:
-        return result["response"]
-    else:
-        # If Cerebras fails, try fallback
-        return _fallback_response(prompt, result["error"])
+    return _response_or_fallback(prompt, await client.generate_async(prompt))
+
+async def _generate_batch(prompts: list) -> list:
+    """Send a batch of prompts concurrently over the shared keep-alive connections"""
+    client = get_client()
+    return await asyncio.gather(*(client.generate_async(prompt) for prompt in prompts), return_exceptions=True)
+
+_CLASSIFY_BATCHER = MicroBatcher(
+    _generate_batch,
+    max_batch=CEREBRAS_MAX_BATCH,
+    max_wait_ms=CEREBRAS_MAX_WAIT_MS,
+    timeout=CEREBRAS_CLASSIFY_TIMEOUT,
+    max_concurrency=CEREBRAS_MAX_CONCURRENT_BATCHES
+)
+
+async def batched_classify(prompt: str) -> str:
+    """
+    Like call_cerebras_qwen_async, but coalesced with other in-flight prompts
+    
+    Args:
+        prompt: Input prompt
+        
+    Returns:
+        Model response or fallback response
+    """
+    return _response_or_fallback(prompt, await _CLASSIFY_BATCHER.submit(prompt))
 
 def _fallback_response(prompt: str, error_msg: str = None) -> str:
     """
@@ -220,33 +390,17 @@ def _fallback_response(prompt: str, error_msg: str = None) -> str:
     Returns:
         Fallback response
     """
-    if os.getenv("DEBUG_CEREBRAS", "false").lower() == "true":
-        if error_msg:
-            print(f"Cerebras Debug - Fallback triggered due to: {error_msg}")
-        else:
-            print("Cerebras Debug - Fallback triggered due to connectivity issues")
+    logger.debug("Cerebras fallback triggered due to: %s", error_msg or "connectivity issues")
     
     # Simple rule-based fallback for task classification
     prompt_lower = prompt.lower()
     
     # Task classification fallback
     if "classify" in prompt_lower or "task" in prompt_lower:
-        if any(word in prompt_lower for word in ["text", "extract", "read", "ocr"]):
-            return "OCR"
-        elif any(word in prompt_lower for word in ["describe", "caption", "what is this"]):
-            return "Image Captioning"
-        elif any(word in prompt_lower for word in ["what color", "how many", "count", "visual qa", "vqa"]):
-            return "Visual QA"
-        elif any(word in prompt_lower for word in ["classify", "category", "type"]):
-            return "Image Classification"
-        elif any(word in prompt_lower for word in ["detect", "objects", "find"]):
-            return "Object Detection"
-        elif any(word in prompt_lower for word in ["style", "art", "transfer"]):
-            return "Style Transfer"
-        elif any(word in prompt_lower for word in ["medical", "diagnosis", "health"]):
-            return "Medical Diagnosis"
-        else:
-            return "Other"
+        # Only look at the question, not the template's labels and list of options
+        if prompt.startswith(CLASSIFICATION_PROMPT_PREFIX):
+            prompt = prompt[len(CLASSIFICATION_PROMPT_PREFIX):].split("\nImage: ", 1)[0]
+        return classify_from_text(prompt)
     
     # General fallback response
     return f"Fallback response: I'm currently using a simplified response system. Your prompt was: '{prompt[:100]}...'"
@@ -262,8 +416,8 @@ def call_cerebras_qwen_chat(messages: list, **kwargs) -> str:
     Returns:
         Model response or error message
     """
-    config = get_cerebras_config()
-    client = CerebrasQwenClient(config)
+    client = get_client()
+    config = client.config
     
     # Find working endpoint
     working_url = client._find_working_endpoint()
@@ -285,19 +439,16 @@ def call_cerebras_qwen_chat(messages: list, **kwargs) -> str:
             json=data,
             timeout=config.timeout
         )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result.get("choices", [{}])[0].get("message", {}).get("content", "")
-        else:
-            return _fallback_chat_response(messages, f"API call failed with status {response.status_code}: {response.text}")
-            
-    except requests.exceptions.ConnectionError as e:
-        return _fallback_chat_response(messages, f"Connection error - {str(e)}")
-    except requests.exceptions.Timeout as e:
-        return _fallback_chat_response(messages, f"Request timeout - {str(e)}")
-    except requests.exceptions.RequestException as e:
-        return _fallback_chat_response(messages, f"Request failed - {str(e)}")
+    except _REQUEST_ERRORS as e:
+        return _fallback_chat_response(messages, _describe_request_error(e, sep=" - "))
+    
+    if response.status_code == 200:
+        try:
+            result = orjson.loads(response.content)
+        except orjson.JSONDecodeError as e:
+            return _fallback_chat_response(messages, _describe_request_error(e, sep=" - "))
+        return result.get("choices", [{}])[0].get("message", {}).get("content", "")
+    return _fallback_chat_response(messages, f"API call failed with status {response.status_code}: {response.text}")
 
 def _fallback_chat_response(messages: list, error_msg: str = None) -> str:
     """
@@ -310,11 +461,7 @@ def _fallback_chat_response(messages: list, error_msg: str = None) -> str:
     Returns:
         Fallback response
     """
-    if os.getenv("DEBUG_CEREBRAS", "false").lower() == "true":
-        if error_msg:
-            print(f"Cerebras Debug - Chat fallback triggered due to: {error_msg}")
-        else:
-            print("Cerebras Debug - Chat fallback triggered due to connectivity issues")
+    logger.debug("Cerebras chat fallback triggered due to: %s", error_msg or "connectivity issues")
     
     # Extract the last user message
     last_user_message = ""
@@ -329,15 +476,14 @@ def _fallback_chat_response(messages: list, error_msg: str = None) -> str:
     else:
         return "Fallback response: I'm currently using a simplified response system."
 
-def test_cerebras_connectivity() -> Dict[str, Any]:
+async def test_cerebras_connectivity() -> Dict[str, Any]:
     """
-    Test connectivity to Cerebras API endpoints
+    Test connectivity to Cerebras API endpoints, probing them all concurrently
     
     Returns:
         Dict with connectivity test results
     """
     config = get_cerebras_config()
-    client = CerebrasQwenClient(config)
     
     results = {
         "primary_url": config.api_url,
@@ -347,8 +493,15 @@ def test_cerebras_connectivity() -> Dict[str, Any]:
     }
     
     urls_to_test = [config.api_url] + config.fallback_urls
+    # A client scoped to this call, so running it under asyncio.run leaves no pooled
+    # connections tied to a closed loop in the shared client
+    async with httpx.AsyncClient(timeout=2) as probe_client:
+        responses = await asyncio.gather(
+            *(probe_client.head(url) for url in urls_to_test),
+            return_exceptions=True
+        )
     
-    for url in urls_to_test:
+    for url, response in zip(urls_to_test, responses):
         test_result = {
             "url": url,
             "reachable": False,
@@ -356,42 +509,32 @@ def test_cerebras_connectivity() -> Dict[str, Any]:
             "error": None
         }
         
-        try:
-            response = client.session.head(url, timeout=5)
+        if isinstance(response, httpx.ConnectError):
+            test_result["error"] = f"Connection error: {str(response)}"
+        elif isinstance(response, httpx.TimeoutException):
+            test_result["error"] = f"Timeout: {str(response)}"
+        elif isinstance(response, Exception):
+            test_result["error"] = f"Error: {str(response)}"
+        else:
             test_result["reachable"] = True
             test_result["status_code"] = response.status_code
-        except requests.exceptions.ConnectionError as e:
-            test_result["error"] = f"Connection error: {str(e)}"
-        except requests.exceptions.Timeout as e:
-            test_result["error"] = f"Timeout: {str(e)}"
-        except Exception as e:
-            test_result["error"] = f"Error: {str(e)}"
         
         results["all_tests"].append(test_result)
         
-        if test_result["reachable"] and test_result["status_code"] < 500:
+        # Keep the priority order: the first reachable URL in the list wins
+        if results["working_endpoint"] is None and test_result["reachable"] and test_result["status_code"] < 500:
             results["working_endpoint"] = url
-            break
     
     return results
 
 # Task classification specific function
-def classify_task_with_cerebras_qwen(question: str, image_context: Optional[str] = None) -> str:
-    """
-    Classify AI task using Cerebras Qwen model
-    
-    Args:
-        question: User's question
-        image_context: Optional image description
-        
-    Returns:
-        Predicted task type
-    """
-    prompt = f"""
+# Classification prompt, split around the interpolated fields so building it is one f-string
+CLASSIFICATION_PROMPT_PREFIX = """
 Classify the AI task based on the question and image description.
 
-Question: {question}
-Image: {image_context or "No image context provided"}
+Question: """
+
+CLASSIFICATION_PROMPT_SUFFIX = """
 
 Respond with exactly one of these options:
 - OCR
@@ -405,15 +548,13 @@ Respond with exactly one of these options:
 
 Task:"""
 
-    
-    response = call_cerebras_qwen(prompt)
-    
-    if os.getenv("DEBUG_CEREBRAS", "false").lower() == "true":
-        print("Response from calling cerebras:")
-        print(response)
-    
-    # Parse response to extract task
-    response_lower = response.lower().strip()
+def build_classification_prompt(question: str, image_context: Optional[str] = None) -> str:
+    """Build the task classification prompt"""
+    return f"{CLASSIFICATION_PROMPT_PREFIX}{question}\nImage: {image_context or 'No image context provided'}{CLASSIFICATION_PROMPT_SUFFIX}"
+
+def _task_from_cerebras_response(response: str) -> str:
+    """Extract the predicted task from a Cerebras classification response"""
+    logger.debug("Response from calling cerebras: %s", response)
     
     # Check if this is a fallback response
     if response.startswith("Fallback response:"):
@@ -421,42 +562,32 @@ Task:"""
         # The fallback response should already be the correct task type
         return response
     
-    # Define task keywords for parsing
-    task_mapping = {
-        "ocr": "OCR",
-        "text": "OCR",
-        "read": "OCR",
-        "extract": "OCR",
-        "caption": "Image Captioning",
-        "describe": "Image Captioning",
-        "what is this": "Image Captioning",
-        "visual qa": "Visual QA",
-        "vqa": "Visual QA",
-        "what color": "Visual QA",
-        "how many": "Visual QA",
-        "count": "Visual QA",
-        "classify": "Image Classification",
-        "category": "Image Classification",
-        "type": "Image Classification",
-        "detect": "Object Detection",
-        "objects": "Object Detection",
-        "style transfer": "Style Transfer",
-        "style": "Style Transfer",
-        "art": "Style Transfer",
-        "medical": "Medical Diagnosis",
-        "diagnosis": "Medical Diagnosis",
-        "health": "Medical Diagnosis"
-    }
-    
     return parse_task_from_response(response) or "Other"
 
-def parse_task_from_response(response: str) -> str:
-    valid_tasks = ["OCR", "Image Captioning", "Visual QA", "Image Classification", "Object Detection", "Style Transfer", "Medical Diagnosis", "Other"]
-    
-    response = response.lower().replace(".", "").replace(",", "").replace("?", "").replace("!", "")
+def classify_task_with_cerebras_qwen(question: str, image_context: Optional[str] = None) -> str:
+    """
+    Classify AI task using Cerebras Qwen model
     
-    for task in valid_tasks:
-        if task.lower() in response:
-            return task
+    Args:
+        question: User's question
+        image_context: Optional image description
+        
+    Returns:
+        Predicted task type
+    """
+    response = call_cerebras_qwen(build_classification_prompt(question, image_context))
+    return _task_from_cerebras_response(response)
+
+async def classify_task_with_cerebras_qwen_async(question: str, image_context: Optional[str] = None) -> str:
+    """
+    Async version of classify_task_with_cerebras_qwen
     
-    return "Other"
+    Args:
+        question: User's question
+        image_context: Optional image description
+        
+    Returns:
+        Predicted task type
+    """
+    response = await batched_classify(build_classification_prompt(question, image_context))
+    return _task_from_cerebras_response(response)
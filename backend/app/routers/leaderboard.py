@@ -1,17 +1,86 @@
-import json
 import os
+import threading
 from datetime import datetime
 from fastapi import APIRouter, HTTPException
 from typing import List, Dict, Optional
+import numpy as np
+import orjson
+from app.routers import log_store
 
 router = APIRouter(
     prefix="/leaderboard",
     tags=["leaderboard"]
 )
 
-# Get the absolute path to logs.json relative to the backend directory
-LOGS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "logs.json")
-print(LOGS_FILE)
+LOGS_FILE = log_store.LOGS_FILE
+
+# Leaderboards per task ("__all__" when unfiltered), valid while the logs file keeps the same (mtime, size)
+_ALL_TASKS = "__all__"
+_cache = {"key": None, "by_task": {}}
+_cache_lock = threading.Lock()
+
+def _intern(values: list):
+    """Map values to integer codes; returns (unique values, codes)"""
+    uniques, codes = np.unique(np.asarray(values), return_inverse=True)
+    return uniques.tolist(), codes.ravel()
+
+def _leaderboard(models: list, totals: np.ndarray, runs: np.ndarray, first_seen: np.ndarray) -> List[dict]:
+    """Average latency per model that has runs, sorted fastest first"""
+    # Visit models in the order they first appear in the log, so ties keep that order
+    leaderboard = [
+        {"model": models[i], "average_latency": round(float(totals[i]) / int(runs[i]), 2), "runs": int(runs[i])}
+        for i in np.argsort(first_seen, kind="stable")
+        if runs[i]
+    ]
+    leaderboard.sort(key=lambda x: x["average_latency"])
+    return leaderboard
+
+def _build_leaderboards(logs: list) -> Dict[str, List[dict]]:
+    """Aggregate logs into a leaderboard for every task, plus one across all tasks"""
+    if not logs:
+        return {}
+    
+    models, model_codes = _intern([log["model"] for log in logs])
+    tasks, task_codes = _intern([log["task"] for log in logs])
+    latency = np.fromiter((log["latency"] for log in logs), dtype=np.float64, count=len(logs))
+    
+    # Sum, count and first position per (task, model) cell, each in one C-level pass
+    n_models, n_tasks = len(models), len(tasks)
+    cells = task_codes * n_models + model_codes
+    shape = (n_tasks, n_models)
+    totals = np.bincount(cells, weights=latency, minlength=n_tasks * n_models).reshape(shape)
+    runs = np.bincount(cells, minlength=n_tasks * n_models).reshape(shape)
+    first_seen = np.full(n_tasks * n_models, len(logs))
+    np.minimum.at(first_seen, cells, np.arange(len(logs)))
+    first_seen = first_seen.reshape(shape)
+    
+    by_task = {
+        _ALL_TASKS: _leaderboard(
+            models,
+            np.bincount(model_codes, weights=latency, minlength=n_models),
+            runs.sum(axis=0),
+            first_seen.min(axis=0)
+        )
+    }
+    for i, task in enumerate(tasks):
+        by_task[task] = _leaderboard(models, totals[i], runs[i], first_seen[i])
+    
+    return by_task
+
+def _get_leaderboards() -> Dict[str, List[dict]]:
+    """Return the cached leaderboards, rebuilding them only when the logs file has changed"""
+    st = os.stat(LOGS_FILE)
+    key = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        if _cache["key"] != key:
+            _cache["by_task"] = _build_leaderboards(log_store.read_entries())
+            _cache["key"] = key
+        return _cache["by_task"]
+
+def warm_cache() -> None:
+    """Build the leaderboards ahead of the first request"""
+    if os.path.exists(LOGS_FILE):
+        _get_leaderboards()
 
 @router.get("")
 def get_leaderboard(task: Optional[str] = None):
@@ -29,46 +98,10 @@ def get_leaderboard(task: Optional[str] = None):
         if not os.path.exists(LOGS_FILE):
             raise HTTPException(status_code=500, detail="Logs file not found")
             
-        # Read logs
-        with open(LOGS_FILE, 'r') as f:
-            logs = json.load(f)
-            
-        # Filter by task if specified
-        if task:
-            logs = [log for log in logs if log["task"] == task]
-            
-        # Group by model and calculate statistics
-        model_stats = {}
-        for log in logs:
-            model = log["model"]
-            latency = log["latency"]
-            
-            if model not in model_stats:
-                model_stats[model] = {
-                    "model": model,
-                    "total_latency": 0,
-                    "runs": 0
-                }
-                
-            model_stats[model]["total_latency"] += latency
-            model_stats[model]["runs"] += 1
-            
-        # Calculate average latency and prepare response
-        leaderboard = []
-        for model, stats in model_stats.items():
-            avg_latency = stats["total_latency"] / stats["runs"]
-            leaderboard.append({
-                "model": model,
-                "average_latency": round(avg_latency, 2),
-                "runs": stats["runs"]
-            })
-            
-        # Sort by average latency (fastest first)
-        leaderboard.sort(key=lambda x: x["average_latency"])
-        
-        return leaderboard
+        # Leaderboards are cached per task; a task nobody has logged has no runs
+        return _get_leaderboards().get(task or _ALL_TASKS, [])
         
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Invalid JSON in logs file")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
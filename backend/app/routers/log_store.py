@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+import orjson
+
+# Append-only log of analysis calls, one JSON object per line
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+LOGS_FILE = BASE_DIR / "logs.jsonl"
+
+# Entries queued but not yet on disk, keyed by id so lookups can see them right away
+_pending: dict = {}
+_queue: Optional[asyncio.Queue] = None
+_writer_task: Optional[asyncio.Task] = None
+
+# Byte offset of each entry's line in LOGS_FILE, and how far the file has been indexed
+_offsets: dict = {}
+_indexed_upto = 0
+
+logger = logging.getLogger(__name__)
+
+def start_writer() -> None:
+    """Start the background task that appends queued entries to LOGS_FILE"""
+    global _queue, _writer_task
+    loop = asyncio.get_running_loop()
+    if _writer_task is not None and not _writer_task.done() and _writer_task.get_loop() is loop:
+        return
+
+    _queue = asyncio.Queue()
+    # Requeue anything a writer on a previous event loop never got to
+    for entry in _pending.values():
+        _queue.put_nowait(entry)
+    _writer_task = loop.create_task(_write_entries(_queue))
+
+async def stop_writer() -> None:
+    """Flush queued entries and stop the background writer"""
+    global _writer_task
+    if _writer_task is None or _writer_task.done():
+        return
+    await _queue.join()
+    _writer_task.cancel()
+    _writer_task = None
+
+def _append(fd: int, data: bytes) -> int:
+    """Append data to an O_APPEND descriptor and return the file offset just past it"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+    return os.lseek(fd, 0, os.SEEK_CUR)
+
+async def _write_entries(queue: asyncio.Queue) -> None:
+    global _indexed_upto
+    # O_APPEND makes each write land at the current end of file, even with several workers appending
+    fd = os.open(LOGS_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        while True:
+            # Drain everything queued so one write covers the whole batch
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                lines = []
+                for entry in batch:
+                    try:
+                        lines.append((entry.get("id"), orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)))
+                    except orjson.JSONEncodeError as e:
+                        logger.error("Failed to encode log entry: %s", e)
+                data = b"".join(line for _, line in lines)
+                end = await asyncio.to_thread(_append, fd, data)
+
+                offset = end - len(data)
+                contiguous = offset == _indexed_upto
+                for entry_id, line in lines:
+                    _offsets[entry_id] = offset
+                    offset += len(line)
+                if contiguous:
+                    _indexed_upto = end
+            except Exception as e:
+                logger.error("Failed to write log entries: %s", e)
+            finally:
+                for entry in batch:
+                    _pending.pop(entry.get("id"), None)
+                    queue.task_done()
+    finally:
+        os.close(fd)
+
+def append_entry(entry: dict) -> None:
+    """Queue a log entry; it is written by the background writer"""
+    start_writer()
+    _pending[entry["id"]] = entry
+    _queue.put_nowait(entry)
+
+def read_entries() -> list:
+    """Read every logged entry, skipping lines that fail to parse"""
+    entries = []
+    if not LOGS_FILE.exists():
+        return entries
+
+    # One read and, normally, one parse of the whole file as a JSON array
+    with open(LOGS_FILE, "rb") as f:
+        data = f.read()
+    lines = [line for line in data.splitlines() if line.strip()]
+    try:
+        return orjson.loads(b"[" + b",".join(lines) + b"]")
+    except orjson.JSONDecodeError:
+        pass
+
+    # A damaged or partially written line: parse line by line and skip the bad ones
+    for line in lines:
+        try:
+            entries.append(orjson.loads(line))
+        except orjson.JSONDecodeError:
+            continue
+
+    return entries
+
+def build_index() -> None:
+    """Index entry offsets in LOGS_FILE, scanning only what was appended since the last call"""
+    global _indexed_upto
+    if not LOGS_FILE.exists():
+        return
+
+    with open(LOGS_FILE, "rb") as f:
+        f.seek(_indexed_upto)
+        offset = _indexed_upto
+        for line in f:
+            # Leave a partially written last line for the next scan
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                entry = None
+            # Skip damaged lines and anything that isn't an entry object
+            entry_id = entry.get("id") if isinstance(entry, dict) else None
+            if entry_id is not None:
+                _offsets[entry_id] = offset
+            offset += len(line)
+        _indexed_upto = offset
+
+def _read_entry_at(offset: int) -> Optional[dict]:
+    with open(LOGS_FILE, "rb") as f:
+        f.seek(offset)
+        line = f.readline()
+    try:
+        entry = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+    return entry if isinstance(entry, dict) else None
+
+def find_entry(result_id: str) -> Optional[dict]:
+    """Find a logged entry by id using the offset index"""
+    entry = _pending.get(result_id)
+    if entry is not None:
+        return entry
+
+    if not LOGS_FILE.exists():
+        return None
+
+    if result_id not in _offsets:
+        # Pick up lines appended by other workers since the last scan
+        build_index()
+
+    offset = _offsets.get(result_id)
+    if offset is None:
+        return None
+
+    entry = _read_entry_at(offset)
+    if entry is None or entry.get("id") != result_id:
+        # Another worker's append moved the line; rescan unindexed lines once and retry
+        build_index()
+        offset = _offsets.get(result_id)
+        entry = _read_entry_at(offset) if offset is not None else None
+        if entry is None or entry.get("id") != result_id:
+            return None
+    return entry
@@ -1,55 +1,62 @@
-import time
+import heapq
+import math
+import threading
 from fastapi import APIRouter
-from typing import List, Dict
-from pydantic import BaseModel
-
-class ModelMetric(BaseModel):
-    model_name: str
-    latency: float
-    timestamp: float
-    task: str
+from typing import Dict
 
 router = APIRouter(
     prefix="/metrics",
     tags=["metrics"]
 )
 
-# In-memory storage for model metrics (in production, this would be a database)
-model_metrics: List[ModelMetric] = []
+# In-memory metrics (in production, this would be a database). Only the aggregates the
+# GET endpoints need are kept, updated on every record so nothing rescans the history.
+_lock = threading.Lock()
+# Number of metrics recorded so far; doubles as each record's sequence number for tie-breaking
+_size = 0
+_stats: Dict[str, dict] = {}
+# Fastest run per model as (latency, record index, task)
+_fastest_per_model: Dict[str, tuple] = {}
+
+def _append(model_name: str, latency: float, task: str) -> None:
+    global _size
+    with _lock:
+        s = _stats.setdefault(model_name, {"count": 0, "total_latency": 0.0, "min_latency": math.inf, "max_latency": 0.0})
+        s["count"] += 1
+        s["total_latency"] += latency
+        if latency < s["min_latency"]:
+            s["min_latency"] = latency
+        if latency > s["max_latency"]:
+            s["max_latency"] = latency
+        
+        # Strictly faster only, so the earliest of equal latencies is kept
+        fastest = _fastest_per_model.get(model_name)
+        if fastest is None or latency < fastest[0]:
+            _fastest_per_model[model_name] = (latency, _size, task)
+        
+        _size += 1
 
 @router.post("/record")
 def record_metric(model_name: str, latency: float, task: str):
     """Record a model's performance metric"""
-    metric = ModelMetric(
-        model_name=model_name,
-        latency=latency,
-        timestamp=time.time(),
-        task=task
-    )
-    model_metrics.append(metric)
+    _append(model_name, latency, task)
     return {"message": "Metric recorded successfully"}
 
 @router.get("/leaderboard")
 def get_leaderboard(limit: int = 3):
     """Get the fastest models leaderboard"""
-    # Sort by latency and get top N
-    sorted_metrics = sorted(model_metrics, key=lambda x: x.latency)
-    leaderboard = []
+    with _lock:
+        fastest = list(_fastest_per_model.items())
     
-    # Group by model name and get the fastest time for each
-    model_fastest = {}
-    for metric in sorted_metrics:
-        if metric.model_name not in model_fastest or metric.latency < model_fastest[metric.model_name].latency:
-            model_fastest[metric.model_name] = metric
+    # Top N by latency (earliest first on ties) without sorting every model
+    fastest = heapq.nsmallest(limit, fastest, key=lambda item: item[1][:2])
     
-    # Sort by latency again and limit results
-    fastest_models = sorted(model_fastest.values(), key=lambda x: x.latency)[:limit]
-    
-    for metric in fastest_models:
+    leaderboard = []
+    for model_name, (latency, _, task) in fastest:
         leaderboard.append({
-            "model_name": metric.model_name,
-            "latency": metric.latency,
-            "task": metric.task
+            "model_name": model_name,
+            "latency": latency,
+            "task": task
         })
     
     return leaderboard
@@ -57,23 +64,8 @@ def get_leaderboard(limit: int = 3):
 @router.get("/model_stats")
 def get_model_stats():
     """Get statistics for all models"""
-    stats = {}
-    for metric in model_metrics:
-        if metric.model_name not in stats:
-            stats[metric.model_name] = {
-                "count": 0,
-                "total_latency": 0,
-                "min_latency": float('inf'),
-                "max_latency": 0
-            }
-        
-        stats[metric.model_name]["count"] += 1
-        stats[metric.model_name]["total_latency"] += metric.latency
-        stats[metric.model_name]["min_latency"] = min(stats[metric.model_name]["min_latency"], metric.latency)
-        stats[metric.model_name]["max_latency"] = max(stats[metric.model_name]["max_latency"], metric.latency)
-    
-    # Calculate averages
-    for model_name in stats:
-        stats[model_name]["avg_latency"] = stats[model_name]["total_latency"] / stats[model_name]["count"]
-    
-    return stats
+    with _lock:
+        return {
+            model_name: {**s, "avg_latency": s["total_latency"] / s["count"]}
+            for model_name, s in _stats.items()
+        }
@@ -1,8 +1,41 @@
 import os
+import logging
 import requests
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from requests.adapters import HTTPAdapter
+import httpx
+import orjson
+from .task_keywords import parse_task_from_response
+
+logger = logging.getLogger(__name__)
+# Resolved once at import; DEBUG_QWEN turns on this module's debug logs
+DEBUG_QWEN = os.getenv("DEBUG_QWEN", "false").lower() == "true"
+if DEBUG_QWEN:
+    logger.setLevel(logging.DEBUG)
+
+# Warn about a missing key once, not on every call
+_warned_missing_key = False
+
+# Shared session so TCP/TLS connections to the Qwen API are reused across calls
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+_SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+# Async counterpart used from FastAPI handlers
+_ASYNC_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+)
+
+async def close_clients() -> None:
+    """Close the shared HTTP clients; called on app shutdown"""
+    await _ASYNC_CLIENT.aclose()
+    _SESSION.close()
 
 def call_qwen_model_local(prompt: str) -> str:
+    # Deferred so importing this module doesn't pull in transformers
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
     # Load the Qwen model and tokenizer
     model = AutoModelForCausalLM.from_pretrained("qwen-model")
     tokenizer = AutoTokenizer.from_pretrained("qwen-model")
@@ -18,16 +51,9 @@ def call_qwen_model_local(prompt: str) -> str:
 
     return response_text
 
-def call_qwen_model_api(prompt: str) -> str:
-    """
-    Call Qwen model via API endpoint
-    
-    Args:
-        prompt (str): The input prompt for the model
-        
-    Returns:
-        str: The model's response or error message
-    """
+def _build_api_request(prompt: str):
+    """Build the (url, headers, data, timeout) for a Qwen API call from the environment"""
+    global _warned_missing_key
     # Set the API endpoint URL - configure this to your actual API endpoint
     # For local development, you might use a local API server
     # You can override this with environment variable QWEN_API_URL
@@ -46,7 +72,9 @@ def call_qwen_model_api(prompt: str) -> str:
     if api_key:
         headers["Authorization"] = f"Bearer {api_key}"
     elif not url.startswith("http://localhost"):  # Warn if no API key for external APIs
-        print("Warning: No QWEN_API_KEY provided for external API call")
+        if not _warned_missing_key:
+            logger.warning("No QWEN_API_KEY provided for external API call")
+            _warned_missing_key = True
 
     # Set the API request data with configurable parameters
     data = {
@@ -54,45 +82,64 @@ def call_qwen_model_api(prompt: str) -> str:
         "max_tokens": int(os.getenv("QWEN_MAX_TOKENS", "100")),
         "temperature": float(os.getenv("QWEN_TEMPERATURE", "0.7"))
     }
+    
+    # Configurable timeout
+    timeout = int(os.getenv("QWEN_API_TIMEOUT", "30"))
+    
+    # Debug logging, with the API key redacted
+    if logger.isEnabledFor(logging.DEBUG):
+        logged_headers = {**headers, "Authorization": "Bearer ***"} if "Authorization" in headers else headers
+        logger.debug("Qwen API request - URL: %s, headers: %s, data: %s, timeout: %s", url, logged_headers, data, timeout)
+    
+    return url, headers, data, timeout
 
-    try:
-        # Send the API request with configurable timeout
-        timeout = int(os.getenv("QWEN_API_TIMEOUT", "30"))
-        
-        # Debug logging
-        if os.getenv("DEBUG_QWEN", "false").lower() == "true":
-            print(f"Qwen API Debug - URL: {url}")
-            print(f"Qwen API Debug - Headers: {headers}")
-            print(f"Qwen API Debug - Data: {data}")
-            print(f"Qwen API Debug - Timeout: {timeout}")
-        
-        response = requests.post(url, headers=headers, json=data, timeout=timeout)
+def _response_text(status_code: int, content: bytes) -> str:
+    # Check if the response was successful
+    if status_code == 200:
+        # Return the response text
+        try:
+            result = orjson.loads(content)
+        except orjson.JSONDecodeError as e:
+            # e.g. an HTML page from a proxy or gateway
+            return f"Error: Failed to call Qwen API - {str(e)}"
+        return result.get("response", result.get("text", "No response text"))
+    # Return an error message with status code
+    return f"Error: API call failed with status {status_code}"
+
+def call_qwen_model_api(prompt: str) -> str:
+    """
+    Call Qwen model via API endpoint
+    
+    Args:
+        prompt (str): The input prompt for the model
         
-        # Check if the response was successful
-        if response.status_code == 200:
-            # Return the response text
-            result = response.json()
-            return result.get("response", result.get("text", "No response text"))
-        else:
-            # Return an error message with status code
-            return f"Error: API call failed with status {response.status_code}"
+    Returns:
+        str: The model's response or error message
+    """
+    url, headers, data, timeout = _build_api_request(prompt)
+
+    try:
+        response = _SESSION.post(url, headers=headers, json=data, timeout=timeout)
+        return _response_text(response.status_code, response.content)
             
     except requests.exceptions.RequestException as e:
         return f"Error: Failed to call Qwen API - {str(e)}"
 
-def parse_task_from_response(response: str) -> str:
-    # Define the valid task strings
-    valid_tasks = ["OCR", "Image Captioning", "Visual QA", "Image Classification", "Object Detection", "Style Transfer", "Medical Diagnosis", "Other"]
-
-    # Convert the response to lowercase and remove punctuation
-    response = response.lower().replace(".", "").replace(",", "").replace("?", "").replace("!", "")
-
-    # Iterate over the valid tasks
-    for task in valid_tasks:
-        # Check if the task is in the response
-        if task.lower() in response:
-            # Return the task
-            return task
+async def call_qwen_model_api_async(prompt: str) -> str:
+    """
+    Async version of call_qwen_model_api using the shared httpx.AsyncClient
+    
+    Args:
+        prompt (str): The input prompt for the model
+        
+    Returns:
+        str: The model's response or error message
+    """
+    url, headers, data, timeout = _build_api_request(prompt)
 
-    # If no valid task is found, return "Other"
-    return "Other"
+    try:
+        response = await _ASYNC_CLIENT.post(url, headers=headers, content=orjson.dumps(data), timeout=timeout)
+        return _response_text(response.status_code, response.content)
+            
+    except httpx.HTTPError as e:
+        return f"Error: Failed to call Qwen API - {str(e)}"
@@ -0,0 +1,52 @@
+import re
+
+# Keywords for each task, checked in order (medical first as it's more specific)
+TASK_KEYWORDS = [
+    ("Medical Diagnosis", ["medical", "diagnosis", "health", "doctor", "patient", "disease", "condition", "symptoms", "diagnose"]),
+    ("OCR", ["text", "read", "extract", "ocr", "words", "letters", "characters", "document"]),
+    ("Image Classification", ["classify", "category", "type", "kind", "sort", "group", "label"]),
+    ("Object Detection", ["objects", "items", "things", "find", "locate", "bounding box", "coordinates", "detect"]),
+    ("Style Transfer", ["style", "art", "transform", "convert", "change style", "make it look like", "transfer"]),
+    ("Image Captioning", ["describe", "caption", "what is this", "what do you see", "scene", "picture", "image"]),
+    ("Visual QA", ["what color", "how many", "count", "identify", "recognize", "visual qa", "vqa"]),
+]
+
+# One compiled alternation per task, so each category is a single scan of the text.
+# Keywords match whole words only, so "art" doesn't fire on "part" or "read" on "bread".
+_PATTERNS = [
+    (task, re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + r")\b", re.IGNORECASE))
+    for task, keywords in TASK_KEYWORDS
+]
+
+def classify_from_text(text: str) -> str:
+    """
+    Classify a task from keywords in the text
+
+    Args:
+        text (str): Question or prompt to scan
+
+    Returns:
+        str: The first task whose keywords appear in the text, or "Other"
+    """
+    for task, pattern in _PATTERNS:
+        if pattern.search(text):
+            return task
+    return "Other"
+
+# Task names a model may answer with, in priority order. "Other" is the fallback, not a
+# pattern, so "other"/"another" in the reply never outranks the real task.
+VALID_TASKS = ("OCR", "Image Captioning", "Visual QA", "Image Classification", "Object Detection", "Style Transfer", "Medical Diagnosis", "Other")
+_PUNCT_TABLE = str.maketrans("", "", ".,?!")
+_TASK_PATTERNS = [
+    (task, re.compile(r"\b" + re.escape(task.lower()) + r"\b"))
+    for task in VALID_TASKS
+    if task != "Other"
+]
+
+def parse_task_from_response(response: str) -> str:
+    """Return the highest-priority task named in a model response, or "Other" if there is none"""
+    text = response.lower().translate(_PUNCT_TABLE)
+    for task, pattern in _TASK_PATTERNS:
+        if pattern.search(text):
+            return task
+    return "Other"
@@ -7,10 +7,19 @@ if __name__ == "__main__":
     import sys
     sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
     
-    # Run the FastAPI app with uvicorn
+    # DEV=1 runs a single auto-reloading worker; otherwise WEB_CONCURRENCY workers (default 1).
+    # Each worker is a separate process: it loads its own copy of the models (PRELOAD_MODELS)
+    # and keeps its own /metrics store and leaderboard cache, so raise WEB_CONCURRENCY only
+    # when there is RAM for every copy and per-worker metrics are acceptable.
+    # loop/http "auto" pick uvloop and httptools when they are installed (uvicorn[standard]).
+    dev = os.getenv("DEV") == "1"
     uvicorn.run(
         "app.main:app",
         host="127.0.0.1",
         port=8000,
-        reload=True
+        reload=dev,
+        workers=1 if dev else int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="auto",
+        http="auto",
+        log_level="info" if dev else "warning"
     )
@@ -30,6 +30,16 @@ def create_env_file():
     
     print("✅ Created .env file from template")
 
+_LOADED = False
+
+def _load_dotenv_once():
+    """Load .env into the environment the first time it's needed"""
+    global _LOADED
+    if not _LOADED:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _LOADED = True
+
 def get_user_input(prompt, default="", password=False):
     """Get user input with default value"""
     if password:
@@ -53,14 +63,8 @@ def configure_cerebras():
     if not env_file.exists():
         create_env_file()
     
-    # Read current values
-    current_values = {}
-    if env_file.exists():
-        with open(env_file, 'r') as f:
-            for line in f:
-                if '=' in line and not line.startswith('#'):
-                    key, value = line.strip().split('=', 1)
-                    current_values[key] = value
+    # Read current values once; the same lines are rewritten below
+    lines, index, current_values = _load_env(env_file)
     
     print("\n📝 Please provide your Cerebras configuration:")
     
@@ -106,7 +110,7 @@ def configure_cerebras():
         "DEBUG_CEREBRAS": debug_mode
     }
     
-    update_env_file(env_file, updates)
+    update_env_file(env_file, lines, index, updates)
     
     print("\n✅ Cerebras configuration saved!")
     print(f"🔧 Enabled: {enable_cerebras}")
@@ -118,27 +122,39 @@ def configure_cerebras():
     print(f"⏱️  Timeout: {timeout}s")
     print(f"🐛 Debug Mode: {debug_mode}")
 
-def update_env_file(env_file, updates):
-    """Update .env file with new values"""
-    lines = []
-    
-    # Read existing file
+def _load_env(env_file):
+    """
+    Read a .env file in a single pass
+
+    Returns:
+        tuple: (lines, index of key to line number, dict of key to value)
+    """
+    lines, index, values = [], {}, {}
     if env_file.exists():
         with open(env_file, 'r') as f:
             lines = f.readlines()
     
-    # Update values
-    updated_keys = set()
     for i, line in enumerate(lines):
-        if '=' in line and not line.startswith('#'):
-            key = line.split('=')[0]
-            if key in updates:
-                lines[i] = f"{key}={updates[key]}\n"
-                updated_keys.add(key)
-    
-    # Add new keys
+        if line.startswith('#'):
+            continue
+        key, sep, value = line.partition('=')
+        if sep:
+            key = key.strip()
+            index[key] = i
+            values[key] = value.strip()
+    
+    return lines, index, values
+
+def update_env_file(env_file, lines, index, updates):
+    """Update the lines read by _load_env with new values and write them back"""
     for key, value in updates.items():
-        if key not in updated_keys:
+        if key in index:
+            lines[index[key]] = f"{key}={value}\n"
+        else:
+            # Keep an appended key off the end of an unterminated last line
+            if lines and not lines[-1].endswith("\n"):
+                lines[-1] += "\n"
+            index[key] = len(lines)
             lines.append(f"{key}={value}\n")
     
     # Write back to file
@@ -150,8 +166,9 @@ def test_cerebras_connection():
     print("\n🧪 Testing Cerebras Connection")
     print("=" * 40)
     
-    # Import after configuration
+    # Import after configuration, once .env is loaded so the cached config sees it
     try:
+        _load_dotenv_once()
         from app.routers.cerebras_qwen import call_cerebras_qwen, get_cerebras_config
         
         config = get_cerebras_config()
@@ -1,17 +1,12 @@
 from fastapi import HTTPException
+import asyncio
+import orjson
 import pytest
-import json
-import os
-from pathlib import Path
-from app.routers.analyze import get_result
-
-# Setup test environment
-TEST_DIR = Path(__file__).parent
-TEST_LOGS = TEST_DIR / "test_logs.json"
+from app.routers import analyze, log_store
 
 @pytest.fixture(autouse=True)
-def setup_test_logs():
-    """Create test logs file before tests"""
+def setup_test_logs(tmp_path, monkeypatch):
+    """Seed a temporary log file with the test entries, index it and return them by ID"""
     test_entries = [
         {
             "id": "test-123",
@@ -22,62 +17,39 @@ def setup_test_logs():
             "result": "Test document text"
         }
     ]
-    with open(TEST_LOGS, 'w') as f:
-        json.dump(test_entries, f, indent=2)
-    yield
-    # Cleanup
-    if os.path.exists(TEST_LOGS):
-        os.remove(TEST_LOGS)
+    logs_file = tmp_path / "logs.jsonl"
+    logs_file.write_bytes(b"".join(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE) for entry in test_entries))
+    monkeypatch.setattr(log_store, "LOGS_FILE", logs_file)
+    monkeypatch.setattr(log_store, "_offsets", {})
+    monkeypatch.setattr(log_store, "_indexed_upto", 0)
+    monkeypatch.setattr(log_store, "_pending", {})
+    log_store.build_index()
+    
+    return {entry["id"]: entry for entry in test_entries}
 
-def test_get_result_valid_id(monkeypatch):
+def test_get_result_valid_id(setup_test_logs):
     """Test getting result with valid ID"""
-    # Patch the BASE_DIR in analyze.py to use our test logs
-    def mock_get_result(result_id: str):
-        logs_file = TEST_LOGS
-        if not os.path.exists(logs_file):
-            raise HTTPException(status_code=404, detail="No results found")
-        
-        with open(logs_file, 'r') as f:
-            logs = json.load(f)
-        
-        result_entry = next((entry for entry in logs if entry["id"] == result_id), None)
-        
-        if not result_entry:
-            raise HTTPException(status_code=404, detail="Result not found")
-        
-        return result_entry
-    
-    monkeypatch.setattr("app.routers.analyze.get_result", mock_get_result)
-    
-    result = get_result("test-123")
-    assert result["id"] == "test-123"
+    result = asyncio.run(analyze.get_result("test-123"))
+    assert result == setup_test_logs["test-123"]
     assert result["result"] == "Test document text"
 
-def test_get_result_invalid_id(monkeypatch):
+def test_get_result_invalid_id():
     """Test getting result with invalid ID"""
-    # Patch the BASE_DIR in analyze.py to use our test logs
-    def mock_get_result(result_id: str):
-        logs_file = TEST_LOGS
-        if not os.path.exists(logs_file):
-            raise HTTPException(status_code=404, detail="No results found")
-        
-        with open(logs_file, 'r') as f:
-            logs = json.load(f)
-        
-        result_entry = next((entry for entry in logs if entry["id"] == result_id), None)
-        
-        if not result_entry:
-            raise HTTPException(status_code=404, detail="Result not found")
-        
-        return result_entry
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(analyze.get_result("invalid-id"))
     
-    monkeypatch.setattr("app.routers.analyze.get_result", mock_get_result)
+    assert exc_info.value.status_code == 404
+    assert exc_info.value.detail == "Result not found for ID: invalid-id"
+
+def test_get_result_no_logs(monkeypatch, tmp_path):
+    """Test getting a result before anything has been logged"""
+    monkeypatch.setattr(log_store, "LOGS_FILE", tmp_path / "missing.jsonl")
     
     with pytest.raises(HTTPException) as exc_info:
-        get_result("invalid-id")
+        asyncio.run(analyze.get_result("test-123"))
     
     assert exc_info.value.status_code == 404
-    assert exc_info.value.detail == "Result not found"
+    assert exc_info.value.detail == "No results found"
 
 def test_file_path_handling(monkeypatch):
     """Test proper file path resolution"""
@@ -86,4 +58,4 @@ def test_file_path_handling(monkeypatch):
     # Verify paths are absolute
     assert UPLOAD_DIR.is_absolute()
     assert (BASE_DIR / "uploads").exists()
-    assert (BASE_DIR / "logs.json").exists()
+    assert (BASE_DIR / "logs.jsonl").exists()
@@ -4,25 +4,28 @@ Test script for Cerebras API connectivity
 This script helps diagnose connectivity issues with the Cerebras API
 """
 
-import os
-import sys
+import socket
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Shared across probe threads so endpoints on the same host reuse connections
+_SESSION = requests.Session()
+
 def test_dns_resolution(domain: str) -> bool:
     """Test DNS resolution for a domain"""
     try:
-        import socket
         socket.gethostbyname(domain)
         return True
     except socket.gaierror:
         return False
 
-def test_http_connectivity(url: str, timeout: int = 5) -> dict:
-    """Test HTTP connectivity to a URL"""
+def test_http_connectivity(url: str, timeout: int = 5, dns_resolved: bool = None) -> dict:
+    """Test HTTP connectivity to a URL, reusing dns_resolved when the host was already looked up"""
     result = {
         "url": url,
         "dns_resolution": False,
@@ -32,12 +35,11 @@ def test_http_connectivity(url: str, timeout: int = 5) -> dict:
     }
     
     # Extract domain from URL
-    from urllib.parse import urlparse
     parsed = urlparse(url)
     domain = parsed.netloc
     
     # Test DNS resolution
-    result["dns_resolution"] = test_dns_resolution(domain)
+    result["dns_resolution"] = test_dns_resolution(domain) if dns_resolved is None else dns_resolved
     
     if not result["dns_resolution"]:
         result["error"] = f"DNS resolution failed for {domain}"
@@ -45,7 +47,7 @@ def test_http_connectivity(url: str, timeout: int = 5) -> dict:
     
     # Test HTTP connectivity
     try:
-        response = requests.head(url, timeout=timeout)
+        response = _SESSION.head(url, timeout=timeout)
         result["http_connectivity"] = True
         result["status_code"] = response.status_code
     except requests.exceptions.ConnectionError as e:
@@ -62,10 +64,13 @@ def main():
     print("🔍 Cerebras API Connectivity Test")
     print("=" * 50)
     
-    # Get configuration
-    api_url = os.getenv("CEREBRAS_API_URL", "https://api.cerebras.com/v1/chat/completions")
-    api_key = os.getenv("CEREBRAS_API_KEY")
-    debug_mode = os.getenv("DEBUG_CEREBRAS", "false").lower() == "true"
+    # Get configuration (imported after load_dotenv so the module sees .env values)
+    from app.routers.cerebras_qwen import DEBUG_CEREBRAS, call_cerebras_qwen, get_cerebras_config
+    
+    config = get_cerebras_config()
+    api_url = config.api_url
+    api_key = config.api_key
+    debug_mode = DEBUG_CEREBRAS
     
     print(f"📋 Configuration:")
     print(f"   API URL: {api_url}")
@@ -88,9 +93,17 @@ def main():
     
     working_endpoints = []
     
-    for url in test_urls:
-        result = test_http_connectivity(url)
-        
+    # Resolve each host once, then probe every endpoint concurrently
+    hosts = list(dict.fromkeys(urlparse(url).netloc for url in test_urls))
+    with ThreadPoolExecutor(max_workers=len(test_urls)) as executor:
+        dns_results = dict(zip(hosts, executor.map(test_dns_resolution, hosts)))
+        results = list(executor.map(
+            lambda url: test_http_connectivity(url, dns_resolved=dns_results[urlparse(url).netloc]),
+            test_urls
+        ))
+    
+    # Print in the original order so the output is deterministic
+    for url, result in zip(test_urls, results):
         status_icon = "✅" if result["http_connectivity"] else "❌"
         print(f"{status_icon} {url}")
         
@@ -131,8 +144,6 @@ def main():
     if working_endpoints and api_key:
         print("🧪 Testing actual API call...")
         try:
-            from app.routers.cerebras_qwen import call_cerebras_qwen
-            
             # Test with a simple prompt
             test_prompt = "Hello, this is a test message."
             result = call_cerebras_qwen(test_prompt)
@@ -11,10 +11,13 @@ def test_ocr_with_screenshot():
     
     endpoints = ["ocr", "simocr"]
     
+    # One session so both endpoint calls reuse the connection to the server
+    session = requests.Session()
+    
     for endpoint in endpoints:
         print(f"\n=== Testing {endpoint} endpoint with screenshot ===")
         try:
-            response = requests.post(
+            response = session.post(
                 f"http://localhost:8000/task/{endpoint}",
                 json=test_data,
                 timeout=30
@@ -25,15 +28,16 @@ def test_ocr_with_screenshot():
             if response.status_code == 200:
                 result = response.json()
                 print(f"Result: {result}")
+                text = result.get("result", "")
                 
                 # Check if text was detected
-                if "No text found in image" in result.get("result", ""):
+                if "No text found in image" in text:
                     print("❌ No text detected")
                 else:
                     print("✅ Text detected!")
                     
                 # Check for the problematic string
-                if "naotoeeeeeeiee" in result.get("result", ""):
+                if "naotoeeeeeeiee" in text:
                     print("❌ ERROR: Found the problematic 'naotoeeeeeeiee' string!")
                 else:
                     print("✅ No problematic string found!")
@@ -43,6 +47,8 @@ def test_ocr_with_screenshot():
                 
         except Exception as e:
             print(f"❌ ERROR: Exception occurred: {e}")
+    
+    session.close()
 
 if __name__ == "__main__":
     print("Testing OCR with screenshot...")
@@ -0,0 +1,57 @@
+import os
+import sys
+import asyncio
+import pytest
+
+# Add the backend directory to Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.routers import ai_classifier, qwen_model
+
+# Replies that mention "other"/"another" before the real task
+REPLIES = [
+    ("Unlike other tasks, this one is OCR.", "OCR"),
+    ("Another possibility aside, the answer is Visual QA", "Visual QA"),
+]
+
+@pytest.fixture(autouse=True)
+def qwen_only(monkeypatch):
+    """Classify through the Qwen models, never Cerebras"""
+    monkeypatch.setattr(ai_classifier, "USE_CEREBRAS", False)
+
+class TestQwenClassification:
+    """Test classifying a task from Qwen model replies"""
+    
+    @pytest.mark.parametrize("reply, task", REPLIES)
+    def test_parse_reply(self, reply, task):
+        """The Qwen module's parser picks the named task over other/another"""
+        assert qwen_model.parse_task_from_response(reply) == task
+    
+    @pytest.mark.parametrize("reply, task", REPLIES)
+    def test_classify_with_api_reply(self, monkeypatch, reply, task):
+        """A Qwen API reply is parsed to the task it names"""
+        monkeypatch.setattr(ai_classifier, "call_qwen_model_api", lambda prompt: reply)
+        assert ai_classifier.classify_task_with_qwen("What does this say?") == task
+    
+    @pytest.mark.parametrize("reply, task", REPLIES)
+    def test_classify_async_with_api_reply(self, monkeypatch, reply, task):
+        """The async path parses the Qwen API reply the same way"""
+        async def fake_api(prompt):
+            return reply
+        monkeypatch.setattr(ai_classifier, "call_qwen_model_api_async", fake_api)
+        assert asyncio.run(ai_classifier.classify_task_with_qwen_async("What does this say?")) == task
+    
+    def test_api_error_falls_back_to_local_model(self, monkeypatch):
+        """An API error reply falls back to the local model"""
+        monkeypatch.setattr(ai_classifier, "call_qwen_model_api", lambda prompt: "Error: API call failed with status 500")
+        monkeypatch.setattr(ai_classifier, "call_qwen_model_local", lambda prompt: "Medical Diagnosis")
+        assert ai_classifier.classify_task_with_qwen("Is this mole benign?") == "Medical Diagnosis"
+    
+    def test_non_json_api_reply(self, monkeypatch):
+        """A 200 Qwen API reply that isn't JSON becomes an error string, not an exception"""
+        class HtmlResponse:
+            status_code = 200
+            content = b"<html>Bad Gateway</html>"
+        
+        monkeypatch.setattr(qwen_model._SESSION, "post", lambda *args, **kwargs: HtmlResponse())
+        assert qwen_model.call_qwen_model_api("prompt").startswith("Error: Failed to call Qwen API - ")
@@ -0,0 +1,38 @@
+import os
+import sys
+import pytest
+
+# Add the backend directory to Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.routers.analyze import _quick_task
+from app.routers.task_keywords import classify_from_text
+
+class TestQuickTask:
+    """Test the keyword fast path that skips captioning and the model"""
+    
+    @pytest.mark.parametrize("question", [
+        "What part of the body is this?",
+        "What does the chart show?",
+        "Is this bread fresh?",
+        "what is the context here",
+    ])
+    def test_keyword_inside_a_word_is_not_a_match(self, question):
+        """Keywords like "art" and "read" must not match inside other words"""
+        assert classify_from_text(question) == "Other"
+        assert _quick_task(question) is None
+    
+    @pytest.mark.parametrize("question, task", [
+        ("Read the sign for me", "OCR"),
+        ("Extract the text from this receipt", "OCR"),
+        ("Is this patient's x-ray normal?", "Medical Diagnosis"),
+        ("Make it look like a Van Gogh painting", "Style Transfer"),
+        ("Describe this scene", "Image Captioning"),
+    ])
+    def test_named_task_takes_fast_path(self, question, task):
+        """Questions that name a task are classified without the model"""
+        assert _quick_task(question) == task
+    
+    def test_visual_qa_goes_to_model(self):
+        """Open "what/where/how" questions still go through captioning and the model"""
+        assert _quick_task("Where was this taken?") is None
@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import asyncio
+import pytest
+
+# Add the backend directory to Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.routers.batching import MicroBatcher
+
+def make_handler(delay: float = 0, calls: list = None):
+    """Handler that doubles each item after sleeping, recording the batches it sees"""
+    async def handler(items):
+        if calls is not None:
+            calls.append(list(items))
+        await asyncio.sleep(delay)
+        return [item * 2 for item in items]
+    return handler
+
+class TestMicroBatcher:
+    """Test suite for the asyncio micro-batcher"""
+    
+    def test_concurrent_submissions_share_a_batch(self):
+        """Items submitted together reach the handler in one call, results in order"""
+        calls = []
+        batcher = MicroBatcher(make_handler(calls=calls), max_batch=8, max_wait_ms=20)
+        
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        
+        assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+        assert calls == [[0, 1, 2, 3, 4]]
+    
+    def test_batches_respect_max_batch(self):
+        """No handler call gets more than max_batch items"""
+        calls = []
+        batcher = MicroBatcher(make_handler(calls=calls), max_batch=4, max_wait_ms=5)
+        
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        
+        assert asyncio.run(run()) == [i * 2 for i in range(10)]
+        assert max(len(batch) for batch in calls) <= 4
+        assert sorted(item for batch in calls for item in batch) == list(range(10))
+    
+    def test_slow_batch_does_not_block_the_queue(self):
+        """With several slots, batches run concurrently rather than one after another"""
+        batcher = MicroBatcher(make_handler(delay=0.3), max_batch=16, max_wait_ms=5, max_concurrency=4)
+        
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(48)))
+        
+        start = time.perf_counter()
+        assert asyncio.run(run()) == [i * 2 for i in range(48)]
+        # Three sequential batches would take 0.9s
+        assert time.perf_counter() - start < 0.6
+    
+    def test_concurrency_is_bounded(self):
+        """No more than max_concurrency batches are in the handler at once"""
+        running = 0
+        peak = 0
+        
+        async def handler(items):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            return items
+        
+        batcher = MicroBatcher(handler, max_batch=2, max_wait_ms=1, max_concurrency=2)
+        
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(12)))
+        
+        assert asyncio.run(run()) == list(range(12))
+        assert peak == 2
+    
+    def test_timed_out_item_is_dropped(self):
+        """An item whose caller timed out while queued never reaches the handler"""
+        calls = []
+        batcher = MicroBatcher(make_handler(delay=0.2, calls=calls), max_batch=1, max_wait_ms=1)
+        
+        async def run():
+            first = asyncio.ensure_future(batcher.submit(1))
+            await asyncio.sleep(0.01)
+            with pytest.raises(asyncio.TimeoutError):
+                await batcher.submit(2, timeout=0.05)
+            return await first
+        
+        assert asyncio.run(run()) == 2
+        assert calls == [[1]]
+    
+    def test_stale_item_fails_with_timeout(self):
+        """Items past their deadline fail with TimeoutError instead of being dispatched"""
+        batcher = MicroBatcher(make_handler())
+        
+        async def run():
+            loop = asyncio.get_running_loop()
+            stale, live = loop.create_future(), loop.create_future()
+            batch = [(1, stale, loop.time() - 1), (2, live, loop.time() + 60), (3, live, None)]
+            kept = batcher._drop_stale(batch)
+            with pytest.raises(asyncio.TimeoutError):
+                stale.result()
+            return [item for item, _, _ in kept]
+        
+        assert asyncio.run(run()) == [2, 3]
+    
+    def test_cancelled_caller_is_dropped(self):
+        """Cancelling a waiting caller removes its item from the next batch"""
+        calls = []
+        batcher = MicroBatcher(make_handler(delay=0.1, calls=calls), max_batch=1, max_wait_ms=1)
+        
+        async def run():
+            first = asyncio.ensure_future(batcher.submit(1))
+            await asyncio.sleep(0.01)
+            second = asyncio.ensure_future(batcher.submit(2))
+            third = asyncio.ensure_future(batcher.submit(3))
+            await asyncio.sleep(0.01)
+            second.cancel()
+            return await asyncio.gather(first, third)
+        
+        assert asyncio.run(run()) == [2, 6]
+        assert calls == [[1], [3]]
+    
+    def test_per_item_exception(self):
+        """An exception returned for one item is raised to that caller only"""
+        async def handler(items):
+            return [ValueError(item) if item == 1 else item for item in items]
+        
+        batcher = MicroBatcher(handler, max_wait_ms=10)
+        
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        
+        results = asyncio.run(run())
+        assert results[0] == 0 and results[2] == 2
+        assert isinstance(results[1], ValueError)
+    
+    def test_handler_error_fails_whole_batch(self):
+        """A handler that raises, or returns the wrong number of results, fails every item"""
+        async def short(items):
+            return items[:-1]
+        
+        batcher = MicroBatcher(short, max_wait_ms=10)
+        
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+        
+        assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+    
+    def test_worker_restarts_on_new_loop(self):
+        """The batcher keeps working when used from a second event loop"""
+        batcher = MicroBatcher(make_handler(), max_wait_ms=1)
+        
+        assert asyncio.run(batcher.submit(1)) == 2
+        first_worker = batcher._worker
+        assert asyncio.run(batcher.submit(2)) == 4
+        assert batcher._worker is not first_worker
@@ -0,0 +1,133 @@
+import os
+import sys
+import asyncio
+import httpx
+import orjson
+import pytest
+import requests
+
+# Add the backend directory to Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.routers import cerebras_qwen
+from app.routers.cerebras_qwen import CerebrasConfig, CerebrasQwenClient
+
+URL = "https://cerebras.test/v1/completions"
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.content = body if isinstance(body, bytes) else orjson.dumps(body)
+        self.text = self.content.decode()
+
+# What a proxy or gateway might send back instead of the API's JSON
+HTML_BODY = b"<html><body>Bad Gateway</body></html>"
+
+@pytest.fixture
+def client(monkeypatch):
+    """A client whose endpoint is already known, so no probes are sent"""
+    monkeypatch.setattr(cerebras_qwen, "_WORKING_URL", None)
+    cerebras_qwen._remember_working_endpoint(URL)
+    return CerebrasQwenClient(CerebrasConfig(api_url=URL, model_name="qwen-test"))
+
+def generate_both(client, monkeypatch, outcome):
+    """Run generate and generate_async with the same canned transport outcome"""
+    def respond(*args, **kwargs):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    async def respond_async(*args, **kwargs):
+        return respond()
+    
+    monkeypatch.setattr(client.session, "post", respond)
+    monkeypatch.setattr(client._client, "post", respond_async)
+    results = []
+    for run in (lambda: client.generate("hi"), lambda: asyncio.run(client.generate_async("hi"))):
+        cerebras_qwen._remember_working_endpoint(URL)
+        results.append(run())
+    return results
+
+class TestGenerate:
+    """generate and generate_async share their request and result handling"""
+    
+    def test_success(self, client, monkeypatch):
+        """A 200 JSON response yields the text, raw body, model and latency"""
+        for result in generate_both(client, monkeypatch, FakeResponse(200, {"text": "OCR"})):
+            assert result["success"] is True
+            assert result["response"] == "OCR"
+            assert result["raw_response"] == {"text": "OCR"}
+            assert result["model"] == "qwen-test"
+            assert result["latency"] >= 0
+    
+    def test_error_status(self, client, monkeypatch):
+        """A non-200 status is reported as an API call error"""
+        for result in generate_both(client, monkeypatch, FakeResponse(500, {"error": "boom"})):
+            assert result["success"] is False
+            assert result["error"].startswith("API call error with status 500")
+    
+    @pytest.mark.parametrize("sync_error, async_error, message", [
+        (requests.exceptions.ConnectionError("down"), httpx.ConnectError("down"), "Connection error: down. Please check"),
+        (requests.exceptions.Timeout("slow"), httpx.ReadTimeout("slow"), "Request timeout: slow. Please try again"),
+        (requests.exceptions.RequestException("bad"), httpx.HTTPError("bad"), "Request failed: bad"),
+    ])
+    def test_transport_errors(self, client, monkeypatch, sync_error, async_error, message):
+        """requests and httpx transport errors map to the same messages"""
+        sync_result, _ = generate_both(client, monkeypatch, sync_error)
+        _, async_result = generate_both(client, monkeypatch, async_error)
+        for result in (sync_result, async_result):
+            assert result["success"] is False
+            assert result["error"].startswith(message)
+    
+    def test_non_json_body(self, client, monkeypatch):
+        """A 200 response that isn't JSON is reported as a failed request, not raised"""
+        for result in generate_both(client, monkeypatch, FakeResponse(200, HTML_BODY)):
+            assert result["success"] is False
+            assert result["error"].startswith("Request failed: ")
+    
+    def test_non_json_body_uses_fallback(self, client, monkeypatch):
+        """call_cerebras_qwen and the chat call fall back on a non-JSON 200 response"""
+        monkeypatch.setattr(cerebras_qwen, "get_client", lambda: client)
+        monkeypatch.setattr(client.session, "post", lambda *args, **kwargs: FakeResponse(200, HTML_BODY))
+        
+        prompt = cerebras_qwen.build_classification_prompt("Read the sign")
+        assert cerebras_qwen.call_cerebras_qwen(prompt) == "OCR"
+        chat = cerebras_qwen.call_cerebras_qwen_chat([{"role": "user", "content": "hello"}])
+        assert chat.startswith("Fallback response:")
+    
+    def test_connection_error_forgets_endpoint(self, client, monkeypatch):
+        """A connection error clears the cached working endpoint"""
+        generate_both(client, monkeypatch, httpx.ConnectError("down"))
+        assert cerebras_qwen._cached_working_endpoint() is None
+    
+    def test_no_endpoint(self, client, monkeypatch):
+        """No reachable endpoint is reported as a failed result, not raised"""
+        monkeypatch.setattr(cerebras_qwen, "_WORKING_URL", None)
+        monkeypatch.setattr(client, "_test_endpoint_connectivity", lambda url: False)
+        async def unreachable(url):
+            return False
+        monkeypatch.setattr(client, "_test_endpoint_connectivity_async", unreachable)
+        
+        for result in (client.generate("hi"), asyncio.run(client.generate_async("hi"))):
+            assert result["success"] is False
+            assert result["error"].startswith("No working Cerebras API endpoint found")
+
+class TestFindWorkingEndpoint:
+    """The sync and async endpoint searches share one cache"""
+    
+    def test_first_reachable_url_is_cached(self, client, monkeypatch):
+        """The first reachable URL is cached and reused by the async search"""
+        monkeypatch.setattr(cerebras_qwen, "_WORKING_URL", None)
+        probed = []
+        def reachable(url):
+            probed.append(url)
+            return url == client.config.fallback_urls[1]
+        monkeypatch.setattr(client, "_test_endpoint_connectivity", reachable)
+        
+        assert client._find_working_endpoint() == client.config.fallback_urls[1]
+        assert probed == [URL] + client.config.fallback_urls[:2]
+        
+        async def never(url):
+            raise AssertionError("cached endpoint should be reused")
+        monkeypatch.setattr(client, "_test_endpoint_connectivity_async", never)
+        assert asyncio.run(client._find_working_endpoint_async()) == client.config.fallback_urls[1]
@@ -0,0 +1,151 @@
+import os
+import sys
+import asyncio
+import orjson
+import pytest
+
+# Add the backend directory to Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.routers import log_store
+
+def entry(entry_id: str, **fields) -> dict:
+    return {"id": entry_id, "task": "OCR", "model": "pytesseract", "latency": 0.5, "result": "text", **fields}
+
+def line(data) -> bytes:
+    return orjson.dumps(data) + b"\n"
+
+# Point the store at a temporary file with an empty index for every test
+@pytest.fixture(autouse=True)
+def logs_file(tmp_path, monkeypatch):
+    path = tmp_path / "logs.jsonl"
+    monkeypatch.setattr(log_store, "LOGS_FILE", path)
+    monkeypatch.setattr(log_store, "_offsets", {})
+    monkeypatch.setattr(log_store, "_indexed_upto", 0)
+    monkeypatch.setattr(log_store, "_pending", {})
+    monkeypatch.setattr(log_store, "_queue", None)
+    monkeypatch.setattr(log_store, "_writer_task", None)
+    return path
+
+class TestLogIndex:
+    """Test the byte-offset index over the JSONL log"""
+    
+    def test_index_records_line_offsets(self, logs_file):
+        """Each entry is indexed at the byte offset of its line"""
+        lines = [line(entry("a")), line(entry("b")), line(entry("c"))]
+        logs_file.write_bytes(b"".join(lines))
+        
+        log_store.build_index()
+        
+        assert log_store._offsets == {"a": 0, "b": len(lines[0]), "c": len(lines[0]) + len(lines[1])}
+        assert log_store._indexed_upto == logs_file.stat().st_size
+        assert log_store.find_entry("b") == entry("b")
+    
+    def test_rescan_only_reads_appended_lines(self, logs_file):
+        """A later scan starts where the last one stopped and picks up new lines"""
+        logs_file.write_bytes(line(entry("a")))
+        log_store.build_index()
+        indexed = log_store._indexed_upto
+        
+        with open(logs_file, "ab") as f:
+            f.write(line(entry("b")))
+        # Drop "a" from the index; a rescan from the old position must not re-add it
+        del log_store._offsets["a"]
+        log_store.build_index()
+        
+        assert log_store._offsets == {"b": indexed}
+    
+    def test_find_entry_picks_up_lines_from_other_writers(self, logs_file):
+        """An id missing from the index triggers a rescan of newly appended lines"""
+        logs_file.write_bytes(line(entry("a")))
+        log_store.build_index()
+        
+        with open(logs_file, "ab") as f:
+            f.write(line(entry("b")))
+        
+        assert log_store.find_entry("b") == entry("b")
+        assert log_store.find_entry("missing") is None
+    
+    def test_partial_last_line_is_left_for_next_scan(self, logs_file):
+        """A line still being written isn't indexed until it ends with a newline"""
+        complete = line(entry("a"))
+        partial = line(entry("b"))
+        logs_file.write_bytes(complete + partial[:10])
+        
+        log_store.build_index()
+        assert "b" not in log_store._offsets
+        assert log_store._indexed_upto == len(complete)
+        
+        with open(logs_file, "ab") as f:
+            f.write(partial[10:])
+        log_store.build_index()
+        assert log_store._offsets["b"] == len(complete)
+        assert log_store.find_entry("b") == entry("b")
+    
+    def test_damaged_and_non_object_lines_are_skipped(self, logs_file):
+        """Unparseable lines and JSON values that aren't objects don't break indexing"""
+        logs_file.write_bytes(b"not json\n" + line([1, 2]) + line("text") + line(None) + line(entry("a")))
+        
+        log_store.build_index()
+        
+        assert list(log_store._offsets) == ["a"]
+        assert log_store.find_entry("a") == entry("a")
+    
+    def test_missing_file(self):
+        """Without a log file nothing is indexed and lookups find nothing"""
+        log_store.build_index()
+        assert log_store._offsets == {}
+        assert log_store.find_entry("a") is None
+
+class TestLogWriter:
+    """Test queuing entries and the background O_APPEND writer"""
+    
+    def test_pending_entry_is_visible_before_write(self, logs_file):
+        """An entry can be looked up as soon as it is queued"""
+        async def run():
+            log_store.append_entry(entry("a"))
+            found = log_store.find_entry("a")
+            await log_store.stop_writer()
+            return found
+        
+        assert asyncio.run(run()) == entry("a")
+    
+    def test_writer_appends_and_indexes(self, logs_file):
+        """Queued entries land in the file, one line each, at the offsets the index records"""
+        logs_file.write_bytes(line(entry("old")))
+        log_store.build_index()
+        
+        async def run():
+            for entry_id in ("a", "b", "c"):
+                log_store.append_entry(entry(entry_id))
+            await log_store.stop_writer()
+        
+        asyncio.run(run())
+        
+        assert log_store._pending == {}
+        assert log_store.read_entries() == [entry("old"), entry("a"), entry("b"), entry("c")]
+        data = logs_file.read_bytes()
+        for entry_id in ("a", "b", "c"):
+            offset = log_store._offsets[entry_id]
+            assert orjson.loads(data[offset:data.index(b"\n", offset)]) == entry(entry_id)
+        assert log_store._indexed_upto == len(data)
+        assert log_store.find_entry("b") == entry("b")
+    
+    def test_writer_restarts_on_new_loop(self, logs_file):
+        """Entries are still written after the first event loop has gone"""
+        async def write(entry_id):
+            log_store.append_entry(entry(entry_id))
+            await log_store.stop_writer()
+        
+        asyncio.run(write("a"))
+        asyncio.run(write("b"))
+        
+        assert [e["id"] for e in log_store.read_entries()] == ["a", "b"]
+
+class TestReadEntries:
+    """Test reading the whole log"""
+    
+    def test_damaged_line_is_skipped(self, logs_file):
+        """A bad line doesn't hide the good ones"""
+        logs_file.write_bytes(line(entry("a")) + b'{"id": "b", \n' + line(entry("c")))
+        assert log_store.read_entries() == [entry("a"), entry("c")]
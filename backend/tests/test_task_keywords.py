@@ -0,0 +1,42 @@
+import os
+import sys
+import pytest
+
+# Add the backend directory to Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.routers.task_keywords import parse_task_from_response
+
+class TestParseTaskFromResponse:
+    """Test mapping a model reply to a task name"""
+    
+    @pytest.mark.parametrize("response, task", [
+        ("OCR", "OCR"),
+        ("The task is Image Captioning.", "Image Captioning"),
+        ("visual qa!", "Visual QA"),
+        ("Medical Diagnosis", "Medical Diagnosis"),
+    ])
+    def test_task_name(self, response, task):
+        """A reply naming a task maps to that task, ignoring case and punctuation"""
+        assert parse_task_from_response(response) == task
+    
+    @pytest.mark.parametrize("response, task", [
+        ("Unlike other tasks, this one is OCR.", "OCR"),
+        ("Another possibility aside, the answer is Visual QA", "Visual QA"),
+    ])
+    def test_other_mentioned_before_task(self, response, task):
+        """A mention of other/another earlier in the reply doesn't outrank the real task"""
+        assert parse_task_from_response(response) == task
+    
+    def test_priority_order(self):
+        """When several tasks are named, the earlier one in VALID_TASKS wins"""
+        assert parse_task_from_response("Not Style Transfer, it's OCR") == "OCR"
+    
+    def test_task_name_inside_a_word(self):
+        """Task names only match as whole words"""
+        assert parse_task_from_response("Socratic reasoning") == "Other"
+    
+    @pytest.mark.parametrize("response", ["Other", "I'm not sure", ""])
+    def test_fallback(self, response):
+        """Replies without a task name fall back to Other"""
+        assert parse_task_from_response(response) == "Other"
@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 # Import the FastAPI app
 from app.main import app
+from app.routers import tasks
 
 # Create a test client
 client = TestClient(app)
@@ -24,6 +25,17 @@ def check_test_image():
     if not os.path.exists(TEST_IMAGE_PATH):
         pytest.skip(f"Test image {TEST_IMAGE_PATH} not found. Skipping tests.")
 
+# Models are cached after the first load; clear them so each test's mocks are used
+@pytest.fixture(autouse=True)
+def clear_model_cache():
+    tasks._get_blip.cache_clear()
+    tasks._get_resnet.cache_clear()
+    tasks.get_ocr.cache_clear()
+    yield
+    tasks._get_blip.cache_clear()
+    tasks._get_resnet.cache_clear()
+    tasks.get_ocr.cache_clear()
+
 class TestTasksRouter:
     """Test suite for the tasks router endpoints"""
     
@@ -36,7 +48,7 @@ class TestTasksRouter:
         }
         
         # Mock paddleocr to avoid actual OCR processing
-        with patch('app.routers.tasks.paddleocr.PaddleOCR') as mock_ocr:
+        with patch('paddleocr.PaddleOCR') as mock_ocr:
             # Setup mock return value
             mock_result = [[[[[10, 10], [100, 10], [100, 50], [10, 50]], ('STOP', 0.95)]]]
             mock_ocr_instance = MagicMock()
@@ -81,8 +93,8 @@ class TestTasksRouter:
         }
         
         # Mock BLIP processor and model
-        with patch('app.routers.tasks.BlipProcessor') as mock_processor, \
-             patch('app.routers.tasks.BlipForConditionalGeneration') as mock_model:
+        with patch('transformers.BlipProcessor') as mock_processor, \
+             patch('transformers.BlipForConditionalGeneration') as mock_model:
             
             # Setup mocks
             mock_processor_instance = MagicMock()
@@ -115,8 +127,8 @@ class TestTasksRouter:
         }
         
         # Mock BLIP processor and model
-        with patch('app.routers.tasks.BlipProcessor') as mock_processor, \
-             patch('app.routers.tasks.BlipForConditionalGeneration') as mock_model:
+        with patch('transformers.BlipProcessor') as mock_processor, \
+             patch('transformers.BlipForConditionalGeneration') as mock_model:
             
             # Setup mocks
             mock_processor_instance = MagicMock()
@@ -149,8 +161,8 @@ class TestTasksRouter:
         }
         
         # Mock ResNet processor and model
-        with patch('app.routers.tasks.AutoFeatureExtractor') as mock_extractor, \
-             patch('app.routers.tasks.AutoModelForImageClassification') as mock_model:
+        with patch('transformers.AutoFeatureExtractor') as mock_extractor, \
+             patch('transformers.AutoModelForImageClassification') as mock_model:
             
             # Setup mocks
             mock_extractor_instance = MagicMock()
@@ -182,7 +194,7 @@ class TestTasksRouter:
         }
         
         # Mock paddleocr
-        with patch('app.routers.tasks.paddleocr.PaddleOCR') as mock_ocr:
+        with patch('paddleocr.PaddleOCR') as mock_ocr:
             mock_result = [[[[[10, 10], [100, 10], [100, 50], [10, 50]], ('STOP', 0.95)]]]
             mock_ocr_instance = MagicMock()
             mock_ocr_instance.ocr.return_value = mock_result